@@ -1,19 +1,21 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.models import User
-from app.auth.utils import SECRET_KEY, ALGORITHM
+from app.auth.utils import SECRET_KEY, ALGORITHM, AUTH_EMBED_USER_CLAIMS
+from app.auth import principal_cache
 
 # Token source (login endpoint)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 
-def get_current_user(
+async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Extract and return the current authenticated user."""
     credentials_exception = HTTPException(
@@ -30,10 +32,26 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    user = db.query(User).filter(User.username == username).first()
-    if not user:
-        raise credentials_exception
+    user = principal_cache.get_principal(username)
+    if user is not None:
+        return user
+
+    if AUTH_EMBED_USER_CLAIMS and "uid" in payload:
+        # Build the user from the signed claims, but only after a primary-key
+        # probe confirms it still exists; repeated once per cache TTL
+        exists = await db.scalar(
+            select(User.id).where(User.id == payload["uid"], User.username == username)
+        )
+        if exists is None:
+            raise credentials_exception
+        user = User(id=payload["uid"], username=username, email=payload.get("email"))
+    else:
+        user = await db.scalar(select(User).where(User.username == username))
+        if not user:
+            raise credentials_exception
+        db.expunge(user)
 
+    principal_cache.cache_principal(username, user)
     return user
 
 
@@ -42,7 +60,7 @@ def get_current_user(
 
 
 # --- Role-based dependencies --- #
-def get_current_organizer(current_user: User = Depends(get_current_user)):
+async def get_current_organizer(current_user: User = Depends(get_current_user)):
     """Allow only users with role='organizer'."""
     if current_user.role != "organizer":
         raise HTTPException(
@@ -52,7 +70,7 @@ def get_current_organizer(current_user: User = Depends(get_current_user)):
     return current_user
 
 
-def get_current_customer(current_user: User = Depends(get_current_user)):
+async def get_current_customer(current_user: User = Depends(get_current_user)):
     """Allow only users with role='customer'."""
     if current_user.role != "customer":
         raise HTTPException(
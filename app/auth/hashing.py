@@ -0,0 +1,68 @@
+"""
+Dedicated executor for bcrypt work.
+
+Hashing runs on its own size-limited pool instead of Starlette's shared
+threadpool, so a login storm cannot starve the other endpoints of worker
+threads. HASH_EXECUTOR=process uses a process pool for true CPU parallelism.
+At most HASH_MAX_PENDING calls may be running or queued; beyond that the
+request is rejected with 503 instead of piling up.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from fastapi import HTTPException, status
+
+from app.auth.utils import hash_password, verify_password
+
+HASH_EXECUTOR = os.getenv("HASH_EXECUTOR", "thread").lower()
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "2"))
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", "64"))
+
+_executor = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(HASH_MAX_PENDING)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                if HASH_EXECUTOR == "process":
+                    _executor = ProcessPoolExecutor(max_workers=HASH_WORKERS)
+                else:
+                    _executor = ThreadPoolExecutor(
+                        max_workers=HASH_WORKERS, thread_name_prefix="bcrypt"
+                    )
+    return _executor
+
+
+async def _run(fn, *args):
+    if not _slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many authentication requests, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), fn, *args)
+    finally:
+        _slots.release()
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run(verify_password, plain_password, hashed_password)
+
+
+def shutdown_hash_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
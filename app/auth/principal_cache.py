@@ -0,0 +1,33 @@
+"""
+Authenticated-principal cache for get_current_user.
+
+Resolved users are kept per token subject (username) in a bounded TTL/LRU
+cache, so repeat requests skip the users lookup. Entries should be dropped
+with invalidate_principal() whenever a user row changes or is deleted.
+
+The cache is per worker process. Every entry is re-checked against the
+database once its TTL runs out (embedded token claims included), so the TTL
+bounds how long any worker can keep authenticating a changed or deleted user.
+"""
+import os
+
+from app.utils.cache import TTLCache
+
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+
+_principals = TTLCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+def get_principal(username: str):
+    return _principals.get(username)
+
+
+def cache_principal(username: str, user):
+    """Cache a user detached from any session (read-only attributes)."""
+    _principals.set(username, user)
+
+
+def invalidate_principal(username: str):
+    """Drop the cached user so this worker re-checks it on the next request."""
+    _principals.pop(username)
@@ -1,10 +1,13 @@
 from fastapi import APIRouter, HTTPException, status, Depends , Request
 from fastapi.responses import JSONResponse
 from jose import jwt,JWTError
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.models import User
-from app.auth.utils import hash_password, verify_password, create_access_token , create_refresh_token
+from app.auth.utils import create_access_token , create_refresh_token, needs_rehash, user_claims
+from app.auth.hashing import hash_password_async, verify_password_async
+from app.auth.principal_cache import invalidate_principal
 from app.auth.schemas import UserCreate, UserLogin
 import os
 REFRESH_SECRET_KEY = os.getenv("REFRESH_SECRET_KEY", "myrefreshsecretkey")
@@ -17,9 +20,9 @@ router = APIRouter(
 
 # --- REGISTER ROUTE ---
 @router.post("/register", status_code=status.HTTP_201_CREATED)
-def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
     # Check if username already exists
-    db_user = db.query(User).filter(User.username == user.username).first()
+    db_user = await db.scalar(select(User).where(User.username == user.username))
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -27,7 +30,7 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Hash password and include role
-    hashed_password = hash_password(user.password)
+    hashed_password = await hash_password_async(user.password)
     new_user = User(
         username=user.username,
         email=user.email,
@@ -35,24 +38,34 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
+
+    # A re-used username must not inherit a deleted user's cache state
+    invalidate_principal(new_user.username)
     
     return {"msg": f"User '{new_user.username}' created successfully "}
 
 
 # --- LOGIN ROUTE ---
 @router.post("/login")
-def login(user: UserLogin, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.username == user.username).first()
-    if not db_user or not verify_password(user.password, db_user.password):
+async def login(user: UserLogin, db: AsyncSession = Depends(get_db)):
+    db_user = await db.scalar(select(User).where(User.username == user.username))
+    if not db_user or not await verify_password_async(user.password, db_user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
         )
+
+    # Transparently upgrade hashes made with an outdated cost factor
+    if needs_rehash(db_user.password):
+        db_user.password = await hash_password_async(user.password)
+        await db.commit()
+        invalidate_principal(db_user.username)
     
-    access_token = create_access_token(data={"sub": user.username})
-    refresh_token = create_refresh_token(data={"sub": user.username})
+    claims = user_claims(db_user)
+    access_token = create_access_token(data=claims)
+    refresh_token = create_refresh_token(data=claims)
     response = JSONResponse({"access_token": access_token, "token_type": "bearer"})
 
     response.set_cookie(
@@ -70,7 +83,7 @@ def login(user: UserLogin, db: Session = Depends(get_db)):
 
 
 @router.post("/refresh")
-def refresh_token(request: Request):
+async def refresh_token(request: Request, db: AsyncSession = Depends(get_db)):
     refresh_token = request.cookies.get("refresh_token")
 
     if not refresh_token:
@@ -90,7 +103,13 @@ def refresh_token(request: Request):
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
 
-    new_access_token = create_access_token({"sub": username})
+    # Deleted users cannot mint new access tokens
+    if await db.scalar(select(User.id).where(User.username == username)) is None:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+    # Carry over any embedded user claims from the refresh token
+    claims = {k: payload[k] for k in ("sub", "uid", "email") if k in payload}
+    new_access_token = create_access_token(claims)
 
     return {"access_token": new_access_token, "token_type": "bearer"}
 
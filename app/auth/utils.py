@@ -8,10 +8,17 @@ REFRESH_SECRET_KEY = os.getenv("REFRESH_SECRET_KEY", "myrefreshsecretkey")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Put the user id and email in token claims so get_current_user needs no DB hit
+AUTH_EMBED_USER_CLAIMS = os.getenv("AUTH_EMBED_USER_CLAIMS", "false").lower() == "true"
+
+
+# bcrypt cost factor for new hashes; older hashes are upgraded on login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
 
 # --- Password Hashing ---
 def hash_password(password: str) -> str:
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
@@ -23,7 +30,24 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 
+def needs_rehash(hashed_password: str) -> bool:
+    """True when a hash was made with another scheme or cost than BCRYPT_ROUNDS."""
+    try:
+        _, scheme, rounds, _ = hashed_password.split("$", 3)
+        return scheme != "2b" or int(rounds) != BCRYPT_ROUNDS
+    except ValueError:
+        return True
+
+
 # --- JWT Token Creation ---
+def user_claims(user) -> dict:
+    """Subject claims for a user's tokens."""
+    claims = {"sub": user.username}
+    if AUTH_EMBED_USER_CLAIMS:
+        claims.update({"uid": user.id, "email": user.email})
+    return claims
+
+
 def create_access_token(data: dict, expires_delta: timedelta = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + expires_delta
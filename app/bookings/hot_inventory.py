@@ -0,0 +1,511 @@
+"""
+Hot-inventory tier for flash sales.
+
+Tickets listed in HOT_INVENTORY_TICKET_IDS keep their remaining quantity in
+an atomic counter store instead of the `tickets` row. A booking only
+decrements the counter and queues a pending entry; a background reconciler
+writes the Booking rows and the final Ticket.quantity back in batches.
+
+The reconciler claims a batch by moving it to a processing list and only
+drops it after the database commit, so a crash mid-batch replays the batch
+instead of losing it. Replays are harmless: each booking row carries its
+reservation_id (unique), and stock and emails are only applied for rows
+actually inserted. Entries that can never be written (their event or ticket
+was deleted) go to a dead-letter list.
+Stock held by queued entries is tracked per ticket, so a counter can be
+reseeded from the `tickets` row at any time without overselling. The
+ticket's event and price live next to its counter and are refreshed on
+every reseed, so all workers price new reservations the same way.
+
+Redis is used when REDIS_URL is set, otherwise an in-process store (single
+worker only, meant for local runs and tests).
+"""
+import json
+import os
+import threading
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import redis
+from apscheduler.schedulers.background import BackgroundScheduler
+from fastapi import HTTPException
+from sqlalchemy import update, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.database import SessionLocal, engine
+from app.models import Booking, Ticket, Event, User
+
+REDIS_URL = os.getenv("REDIS_URL")
+HOT_TICKET_IDS = {
+    int(t) for t in os.getenv("HOT_INVENTORY_TICKET_IDS", "").split(",") if t.strip()
+}
+RECONCILE_INTERVAL_SECONDS = int(os.getenv("HOT_INVENTORY_RECONCILE_SECONDS", "2"))
+RECONCILE_BATCH_SIZE = int(os.getenv("HOT_INVENTORY_BATCH_SIZE", "500"))
+# Lease on the reconcile lock; must comfortably exceed one batch write-back
+RECONCILE_LOCK_SECONDS = int(os.getenv("HOT_INVENTORY_LOCK_SECONDS", "60"))
+
+PENDING_KEY = "hot_inventory:pending"
+PROCESSING_KEY = "hot_inventory:processing"
+DEAD_LETTER_KEY = "hot_inventory:dead"
+HELD_KEY = "hot_inventory:held"
+LOCK_KEY = "hot_inventory:reconcile_lock"
+
+
+def _counter_key(ticket_id: int) -> str:
+    return f"hot_inventory:ticket:{ticket_id}"
+
+
+def _meta_key(ticket_id: int) -> str:
+    return f"hot_inventory:ticket:{ticket_id}:meta"
+
+
+def _held_by(entries: list[dict]) -> dict[int, int]:
+    """Quantity per ticket held by the given entries."""
+    held = {}
+    for e in entries:
+        held[e["ticket_id"]] = held.get(e["ticket_id"], 0) + e["quantity"]
+    return held
+
+
+class LeaseLost(Exception):
+    """The reconcile lock expired while its holder was still writing."""
+
+
+class _LocalLease:
+    token = None
+
+    def renew(self):
+        pass
+
+
+class _RedisLease:
+    def __init__(self, lock):
+        self._lock = lock
+
+    @property
+    def token(self):
+        return self._lock.local.token
+
+    def renew(self):
+        """Reset the lease to its full length; fails if another worker took it over."""
+        try:
+            self._lock.reacquire()
+        except redis.exceptions.LockError as e:
+            raise LeaseLost(str(e)) from e
+
+
+# --- COUNTER STORES --- #
+class InMemoryCounterStore:
+    """Process-local stand-in for Redis."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reconcile_lock = threading.Lock()
+        self._counters = {}
+        self._meta = {}
+        self._held = {}
+        self._pending = deque()
+        self._processing = []
+        self.dead_letters = []
+
+    @contextmanager
+    def reconcile_lock(self, blocking: bool = True):
+        acquired = self._reconcile_lock.acquire(blocking=blocking)
+        try:
+            yield _LocalLease() if acquired else None
+        finally:
+            if acquired:
+                self._reconcile_lock.release()
+
+    def reseed(self, ticket_id: int, quantity: int, event_id: int, price: float,
+               only_if_missing: bool = False) -> int:
+        """
+        Set the counter to the row quantity minus stock held by queued
+        entries, and the ticket's event and price to the row's.
+        """
+        with self._lock:
+            if only_if_missing and ticket_id in self._counters:
+                return self._counters[ticket_id]
+            remaining = max(quantity - self._held.get(ticket_id, 0), 0)
+            self._counters[ticket_id] = remaining
+            self._meta[ticket_id] = (event_id, price)
+            return remaining
+
+    def forget(self, ticket_id: int):
+        with self._lock:
+            self._counters.pop(ticket_id, None)
+            self._meta.pop(ticket_id, None)
+
+    def reserve(self, ticket_id: int, quantity: int, entry: dict):
+        """
+        Returns (remaining stock, queued entry with event_id and total_price
+        filled in), or (-1, None) when sold out, (-2, None) when not seeded.
+        """
+        with self._lock:
+            current = self._counters.get(ticket_id)
+            if current is None or ticket_id not in self._meta:
+                return -2, None
+            if current < quantity:
+                return -1, None
+            event_id, price = self._meta[ticket_id]
+            entry = {**entry, "event_id": event_id, "total_price": price * quantity}
+            self._counters[ticket_id] = current - quantity
+            self._held[ticket_id] = self._held.get(ticket_id, 0) + quantity
+            self._pending.append(json.dumps(entry))
+            return current - quantity, entry
+
+    def release(self, ticket_id: int, quantity: int):
+        with self._lock:
+            if ticket_id in self._counters:
+                self._counters[ticket_id] += quantity
+
+    def claim(self, count: int) -> list[dict]:
+        """Unfinished claimed entries first, else move a new batch to processing."""
+        with self._lock:
+            if not self._processing:
+                while self._pending and len(self._processing) < count:
+                    self._processing.append(self._pending.popleft())
+            return [json.loads(raw) for raw in self._processing]
+
+    def ack(self, lease, entries: list[dict], dead: list[dict] = ()):
+        """Drop the claimed batch once written; `dead` holds the entries that could not be."""
+        with self._lock:
+            for ticket_id, quantity in _held_by(entries).items():
+                self._held[ticket_id] = self._held.get(ticket_id, 0) - quantity
+            self.dead_letters.extend(json.dumps(d) for d in dead)
+            self._processing.clear()
+
+
+# Check, decrement, hold and enqueue in one atomic step so a reservation can
+# never be counted without also being queued for write-back. The entry is
+# priced from the ticket's stored meta; prices are strings so Lua does not
+# truncate them on the way back.
+_RESERVE_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+local meta = redis.call('HMGET', KEYS[4], 'event_id', 'price')
+if not current or not meta[1] then return {-2} end
+current = tonumber(current)
+local quantity = tonumber(ARGV[1])
+if current < quantity then return {-1} end
+local entry = cjson.decode(ARGV[2])
+entry.event_id = tonumber(meta[1])
+entry.total_price = tonumber(meta[2]) * quantity
+local raw = cjson.encode(entry)
+redis.call('DECRBY', KEYS[1], quantity)
+redis.call('HINCRBY', KEYS[3], ARGV[3], quantity)
+redis.call('RPUSH', KEYS[2], raw)
+return {current - quantity, raw}
+"""
+
+# Only restore stock for counters that are still live
+_RELEASE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return redis.call('INCRBY', KEYS[1], tonumber(ARGV[1]))
+end
+return -2
+"""
+
+# Row quantity minus what queued entries still hold; atomic against reserve
+_RESEED_SCRIPT = """
+if ARGV[3] == '1' then
+    local current = redis.call('GET', KEYS[1])
+    if current then return tonumber(current) end
+end
+local held = tonumber(redis.call('HGET', KEYS[2], ARGV[1]) or '0')
+local remaining = math.max(tonumber(ARGV[2]) - held, 0)
+redis.call('SET', KEYS[1], remaining)
+redis.call('HSET', KEYS[3], 'event_id', ARGV[4], 'price', ARGV[5])
+return remaining
+"""
+
+# Replay an unfinished claim, otherwise move up to ARGV[1] entries to processing
+_CLAIM_SCRIPT = """
+local claimed = redis.call('LRANGE', KEYS[2], 0, -1)
+if #claimed > 0 then return claimed end
+for i = 1, tonumber(ARGV[1]) do
+    local raw = redis.call('LPOP', KEYS[1])
+    if not raw then break end
+    redis.call('RPUSH', KEYS[2], raw)
+    claimed[#claimed + 1] = raw
+end
+return claimed
+"""
+
+# Fenced on the lock token: a holder whose lease ran out must not ack a batch
+# the next holder has claimed. ARGV[1]: token; ARGV[2]: {ticket_id: quantity}
+# no longer held; ARGV[3..]: dead letters
+_ACK_SCRIPT = """
+if redis.call('GET', KEYS[4]) ~= ARGV[1] then return 0 end
+for ticket_id, quantity in pairs(cjson.decode(ARGV[2])) do
+    redis.call('HINCRBY', KEYS[2], ticket_id, -quantity)
+end
+for i = 3, #ARGV do
+    redis.call('RPUSH', KEYS[3], ARGV[i])
+end
+redis.call('DEL', KEYS[1])
+return 1
+"""
+
+
+class RedisCounterStore:
+    """Counters and pending queue shared by every API worker through Redis."""
+
+    def __init__(self, url: str):
+        self._redis = redis.Redis.from_url(url)
+        self._reserve = self._redis.register_script(_RESERVE_SCRIPT)
+        self._release = self._redis.register_script(_RELEASE_SCRIPT)
+        self._reseed = self._redis.register_script(_RESEED_SCRIPT)
+        self._claim = self._redis.register_script(_CLAIM_SCRIPT)
+        self._ack = self._redis.register_script(_ACK_SCRIPT)
+
+    @contextmanager
+    def reconcile_lock(self, blocking: bool = True):
+        """One write-back (or reseed) at a time across every worker."""
+        lock = self._redis.lock(LOCK_KEY, timeout=RECONCILE_LOCK_SECONDS)
+        acquired = lock.acquire(blocking=blocking)
+        try:
+            yield _RedisLease(lock) if acquired else None
+        finally:
+            if acquired:
+                try:
+                    lock.release()
+                except redis.exceptions.LockError:
+                    print("⚠️ Hot inventory lock expired before release; raise HOT_INVENTORY_LOCK_SECONDS.")
+
+    def reseed(self, ticket_id: int, quantity: int, event_id: int, price: float,
+               only_if_missing: bool = False) -> int:
+        return int(self._reseed(
+            keys=[_counter_key(ticket_id), HELD_KEY, _meta_key(ticket_id)],
+            args=[ticket_id, quantity, "1" if only_if_missing else "0", event_id, repr(float(price))],
+        ))
+
+    def forget(self, ticket_id: int):
+        self._redis.delete(_counter_key(ticket_id), _meta_key(ticket_id))
+
+    def reserve(self, ticket_id: int, quantity: int, entry: dict):
+        result = self._reserve(
+            keys=[_counter_key(ticket_id), PENDING_KEY, HELD_KEY, _meta_key(ticket_id)],
+            args=[quantity, json.dumps(entry), ticket_id],
+        )
+        if len(result) == 1:
+            return int(result[0]), None
+        return int(result[0]), json.loads(result[1])
+
+    def release(self, ticket_id: int, quantity: int):
+        self._release(keys=[_counter_key(ticket_id)], args=[quantity])
+
+    def claim(self, count: int) -> list[dict]:
+        raw = self._claim(keys=[PENDING_KEY, PROCESSING_KEY], args=[count])
+        return [json.loads(item) for item in raw]
+
+    def ack(self, lease, entries: list[dict], dead: list[dict] = ()):
+        acked = self._ack(
+            keys=[PROCESSING_KEY, HELD_KEY, DEAD_LETTER_KEY, LOCK_KEY],
+            args=[lease.token, json.dumps(_held_by(entries)), *[json.dumps(d) for d in dead]],
+        )
+        if not acked:
+            raise LeaseLost("reconcile lock taken over before ack")
+
+
+store = RedisCounterStore(REDIS_URL) if REDIS_URL else InMemoryCounterStore()
+
+def is_hot(ticket_id: int) -> bool:
+    return ticket_id in HOT_TICKET_IDS
+
+
+def _reseed_counter(ticket_id: int, only_if_missing: bool) -> bool:
+    """
+    Reseed the counter from the `tickets` row. Holding the reconcile lock
+    means no write-back is between its commit and its ack, so every
+    reservation is either in the row or still held in the store, never both
+    or neither. Returns False if the ticket no longer exists.
+    """
+    with store.reconcile_lock(blocking=True):
+        db: Session = SessionLocal()
+        try:
+            ticket = db.execute(
+                select(Ticket.quantity, Ticket.event_id, Ticket.price).where(Ticket.id == ticket_id)
+            ).first()
+        finally:
+            db.close()
+        if ticket is None:
+            store.forget(ticket_id)
+            return False
+        store.reseed(ticket_id, ticket.quantity, ticket.event_id, ticket.price, only_if_missing=only_if_missing)
+        return True
+
+
+# --- BOOK / CANCEL --- #
+async def reserve(customer: User, ticket_id: int, quantity: int) -> dict:
+    """Take stock off the hot counter and queue the booking for write-back."""
+    if quantity <= 0:
+        raise HTTPException(status_code=400, detail="Quantity must be greater than zero")
+
+    # event_id and total_price are filled in by the store from the ticket's live price
+    entry = {
+        "reservation_id": uuid.uuid4().hex,
+        "customer_id": customer.id,
+        "customer_email": customer.email,
+        "ticket_id": ticket_id,
+        "quantity": quantity,
+        "booking_date": datetime.now(timezone.utc).isoformat(),
+    }
+
+    remaining, queued = await run_in_threadpool(store.reserve, ticket_id, quantity, entry)
+    if remaining == -2:
+        # No counter yet (first booking, or the store was flushed); seed and retry once
+        if not await run_in_threadpool(_reseed_counter, ticket_id, True):
+            raise HTTPException(status_code=404, detail="Ticket not found")
+        remaining, queued = await run_in_threadpool(store.reserve, ticket_id, quantity, entry)
+    if remaining < 0:
+        raise HTTPException(status_code=400, detail="Not enough tickets available")
+
+    return {**queued, "status": "pending"}
+
+
+def release(ticket_id: int, quantity: int):
+    """Return cancelled stock to the hot counter."""
+    store.release(ticket_id, quantity)
+
+
+def refresh_counter(ticket_id: int):
+    """
+    Reseed the counter, event and price from the edited `tickets` row,
+    keeping back the stock of reservations not written yet. Call after an
+    organizer edits a ticket.
+    """
+    _reseed_counter(ticket_id, only_if_missing=False)
+
+
+# --- WRITE-BEHIND RECONCILER --- #
+def _insert_ignoring_replays(db: Session, rows: list[dict]) -> set[str]:
+    """Insert booking rows, skipping reservations already written; returns the new reservation ids."""
+    insert = pg_insert if engine.dialect.name == "postgresql" else sqlite_insert
+    statement = (
+        insert(Booking)
+        .on_conflict_do_nothing(index_elements=[Booking.reservation_id])
+        .returning(Booking.reservation_id)
+    )
+    return set(db.execute(statement, rows).scalars())
+
+
+def _write_back(db: Session, entries: list[dict]):
+    """Insert the bookings, take the stock off their tickets and queue confirmations."""
+    from app.bookings.notifications import queue_booking_notifications
+
+    event_ids = {e["event_id"] for e in entries}
+    events = {event.id: event for event in db.query(Event).filter(Event.id.in_(event_ids))}
+    missing = event_ids - events.keys()
+    if missing:
+        raise LookupError(f"event(s) {sorted(missing)} no longer exist")
+
+    inserted = _insert_ignoring_replays(db, [
+        {
+            "reservation_id": e["reservation_id"],
+            "customer_id": e["customer_id"],
+            "event_id": e["event_id"],
+            "ticket_id": e["ticket_id"],
+            "quantity": e["quantity"],
+            "total_price": e["total_price"],
+            "booking_date": datetime.fromisoformat(e["booking_date"]),
+        }
+        for e in entries
+    ])
+    # A replayed batch only applies what the earlier attempt did not commit
+    new_entries = [e for e in entries if e["reservation_id"] in inserted]
+
+    for ticket_id, quantity in _held_by(new_entries).items():
+        result = db.execute(
+            update(Ticket)
+            .where(Ticket.id == ticket_id)
+            .values(quantity=Ticket.quantity - quantity)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            raise LookupError(f"ticket {ticket_id} no longer exists")
+
+    # Confirmations are committed together with the bookings
+    for e in new_entries:
+        queue_booking_notifications(
+            db, e["customer_email"], events[e["event_id"]], e["quantity"], e["total_price"]
+        )
+
+
+def _commit_entries(entries: list[dict], lease):
+    db: Session = SessionLocal()
+    try:
+        _write_back(db, entries)
+        # Only commit while still holding the lock
+        lease.renew()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _reconcile_batch(entries: list[dict], lease) -> list[dict]:
+    """
+    Write a claimed batch back; returns dead letters for the entries that can
+    never be written. Database outages and a lost lease propagate so the
+    batch stays claimed.
+    """
+    try:
+        _commit_entries(entries, lease)
+        return []
+    except (OperationalError, InterfaceError, LeaseLost):
+        raise
+    except Exception as e:
+        if len(entries) == 1:
+            return [{"entry": entries[0], "error": str(e)[:500],
+                     "failed_at": datetime.now(timezone.utc).isoformat()}]
+
+    # One bad entry must not hold back the rest: retry them one by one
+    dead = []
+    for entry in entries:
+        dead.extend(_reconcile_batch([entry], lease))
+    return dead
+
+
+def reconcile_pending(batch_size: int = RECONCILE_BATCH_SIZE) -> int:
+    """Drain queued reservations into `bookings` and `tickets` in batches."""
+    written = 0
+    while True:
+        # Another worker is already draining the queue
+        with store.reconcile_lock(blocking=False) as lease:
+            if lease is None:
+                return written
+            entries = store.claim(batch_size)
+            if not entries:
+                return written
+            try:
+                dead = _reconcile_batch(entries, lease)
+                store.ack(lease, entries, dead)
+            except Exception as e:
+                print(f"❌ Hot inventory reconcile failed, batch kept for retry: {e}")
+                return written
+
+        for d in dead:
+            print(f"❌ Hot inventory reservation {d['entry']['reservation_id']} dead-lettered: {d['error']}")
+        written += len(entries) - len(dead)
+
+
+def start_hot_inventory_reconciler():
+    """Runs the write-behind reconciler in background."""
+    scheduler = BackgroundScheduler()
+    scheduler.add_job(
+        reconcile_pending,
+        "interval",
+        seconds=RECONCILE_INTERVAL_SECONDS,
+        max_instances=1,
+        coalesce=True,
+    )
+    scheduler.start()
+    print(f"⏰ Hot inventory reconciler started (every {RECONCILE_INTERVAL_SECONDS}s).")
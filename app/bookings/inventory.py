@@ -0,0 +1,176 @@
+from fastapi import HTTPException
+from sqlalchemy import update, delete, select, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.models import Ticket, Booking, Event
+from app.bookings import hot_inventory
+from app.bookings.notifications import queue_booking_notifications, queue_bulk_booking_notifications
+
+
+# --- RESERVE STOCK --- #
+async def reserve_tickets(db: AsyncSession, ticket_id: int, quantity: int):
+    """
+    Atomically take `quantity` tickets off the shelf.
+
+    The check and the decrement happen in a single conditional UPDATE, so
+    concurrent buyers serialize on the row lock only for the duration of
+    that statement and stock can never go below zero. Returns the
+    event_id, price and type of the reserved ticket. Nothing is committed here.
+    """
+    if quantity <= 0:
+        raise HTTPException(status_code=400, detail="Quantity must be greater than zero")
+
+    reserved = (await db.execute(
+        update(Ticket)
+        .where(Ticket.id == ticket_id, Ticket.quantity >= quantity)
+        .values(quantity=Ticket.quantity - quantity)
+        .returning(Ticket.event_id, Ticket.price, Ticket.type)
+        .execution_options(synchronize_session=False)
+    )).first()
+
+    if reserved is None:
+        # Tell "no such ticket" apart from "sold out"
+        exists = await db.scalar(select(Ticket.id).where(Ticket.id == ticket_id))
+        if exists is None:
+            raise HTTPException(status_code=404, detail="Ticket not found")
+        raise HTTPException(status_code=400, detail="Not enough tickets available")
+
+    return reserved
+
+
+async def release_tickets(db: AsyncSession, ticket_id: int, quantity: int):
+    """Put `quantity` tickets back on the shelf. Nothing is committed here."""
+    await db.execute(
+        update(Ticket)
+        .where(Ticket.id == ticket_id)
+        .values(quantity=Ticket.quantity + quantity)
+        .execution_options(synchronize_session=False)
+    )
+
+
+# --- BOOK / CANCEL --- #
+async def book_tickets(db: AsyncSession, customer_id: int, ticket_id: int, quantity: int,
+                       customer_email: str = None) -> Booking:
+    """
+    Reserve stock and insert the booking in one transaction. With
+    `customer_email`, the confirmation email is queued in the same transaction.
+    """
+    try:
+        reserved = await reserve_tickets(db, ticket_id, quantity)
+
+        new_booking = Booking(
+            customer_id=customer_id,
+            event_id=reserved.event_id,
+            ticket_id=ticket_id,
+            quantity=quantity,
+            total_price=reserved.price * quantity,
+        )
+        db.add(new_booking)
+        if customer_email:
+            event = await db.get(Event, reserved.event_id)
+            queue_booking_notifications(db, customer_email, event, quantity, new_booking.total_price)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+    await db.refresh(new_booking)
+    return new_booking
+
+
+async def book_tickets_bulk(db: AsyncSession, customer_id: int, items, customer_email: str = None) -> list[dict]:
+    """
+    Reserve several ticket tiers of one event and insert all bookings with a
+    single batched INSERT, all in one transaction. Returns the new bookings
+    as dicts, each with its ticket type under `ticket_type`. With
+    `customer_email`, one consolidated confirmation is queued in the same
+    transaction.
+    """
+    # Merge repeated tiers and lock rows in id order so concurrent bulk
+    # bookings cannot deadlock on each other
+    wanted = {}
+    for item in items:
+        if hot_inventory.is_hot(item.ticket_id):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Ticket {item.ticket_id} is on flash sale and must be booked individually",
+            )
+        # Check each item before merging, or a negative line would offset a positive one
+        if item.quantity <= 0:
+            raise HTTPException(status_code=400, detail="Quantity must be greater than zero")
+        wanted[item.ticket_id] = wanted.get(item.ticket_id, 0) + item.quantity
+
+    try:
+        rows = []
+        ticket_types = {}
+        event_id = None
+        for ticket_id in sorted(wanted):
+            quantity = wanted[ticket_id]
+            reserved = await reserve_tickets(db, ticket_id, quantity)
+
+            if event_id is None:
+                event_id = reserved.event_id
+            elif reserved.event_id != event_id:
+                raise HTTPException(
+                    status_code=400,
+                    detail="All tickets in a bulk booking must belong to the same event",
+                )
+
+            ticket_types[ticket_id] = reserved.type
+            rows.append({
+                "customer_id": customer_id,
+                "event_id": reserved.event_id,
+                "ticket_id": ticket_id,
+                "quantity": quantity,
+                "total_price": reserved.price * quantity,
+            })
+
+        new_bookings = (await db.execute(
+            insert(Booking).returning(
+                Booking.id,
+                Booking.customer_id,
+                Booking.event_id,
+                Booking.ticket_id,
+                Booking.quantity,
+                Booking.total_price,
+                Booking.booking_date,
+            ),
+            rows,
+        )).mappings().all()
+        new_bookings = [
+            {**new_booking, "ticket_type": ticket_types[new_booking["ticket_id"]]}
+            for new_booking in new_bookings
+        ]
+        if customer_email:
+            event = await db.get(Event, event_id)
+            queue_bulk_booking_notifications(db, customer_email, event, new_bookings)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+    return new_bookings
+
+
+async def cancel_booking(db: AsyncSession, customer_id: int, booking_id: int) -> None:
+    """Delete the booking and restore its stock in one transaction."""
+    try:
+        removed = (await db.execute(
+            delete(Booking)
+            .where(Booking.id == booking_id, Booking.customer_id == customer_id)
+            .returning(Booking.ticket_id, Booking.quantity)
+            .execution_options(synchronize_session=False)
+        )).first()
+
+        if removed is None:
+            raise HTTPException(status_code=404, detail="Booking not found")
+
+        await release_tickets(db, removed.ticket_id, removed.quantity)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+    if hot_inventory.is_hot(removed.ticket_id):
+        await run_in_threadpool(hot_inventory.release, removed.ticket_id, removed.quantity)
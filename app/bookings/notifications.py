@@ -0,0 +1,39 @@
+from app import outbox
+from app.utils.email_utils import send_booking_email, send_bulk_booking_email
+
+# Emails go through the transactional outbox: call these before the
+# booking's transaction commits and they are published only if it does.
+# Pre-event reminders are not queued per booking: app.bookings.reminders
+# sends them per event to whoever holds a booking at reminder time.
+
+
+def queue_booking_notifications(db, to_email: str, event, quantity: int, total_price: float):
+    """Queue the booking confirmation email."""
+    outbox.enqueue(
+        db,
+        send_booking_email,
+        to_email,
+        event.title,
+        quantity,
+        total_price
+    )
+
+
+def queue_bulk_booking_notifications(db, to_email: str, event, bookings: list[dict]):
+    """Queue one consolidated confirmation for a bulk booking."""
+    items = [
+        {
+            "type": b["ticket_type"],
+            "quantity": b["quantity"],
+            "total_price": b["total_price"],
+        }
+        for b in bookings
+    ]
+    outbox.enqueue(
+        db,
+        send_bulk_booking_email,
+        to_email,
+        event.title,
+        items,
+        sum(b["total_price"] for b in bookings)
+    )
@@ -0,0 +1,113 @@
+"""
+Pre-event reminders, sent per event instead of one ETA task per booking.
+
+A scheduler scans every REMINDER_SCAN_SECONDS for events starting within
+the next REMINDER_LEAD_MINUTES and atomically claims each one by setting
+events.reminder_sent_at, so several app processes never double-send. For a
+claimed event, send_event_reminders pages through the attendees currently
+holding a booking (cancelled bookings are deleted, so they drop out) and
+queues one batch send per page. Broker and worker memory stay flat however
+large the event is.
+"""
+import os
+from datetime import datetime, timedelta, timezone
+
+from apscheduler.schedulers.background import BackgroundScheduler
+from celery import shared_task
+from sqlalchemy import select, update
+
+from app import outbox
+from app.database import SessionLocal
+from app.models import Booking, Event, User
+from app.utils.email_utils import send_event_reminder_batch
+
+REMINDER_LEAD_MINUTES = float(os.getenv("REMINDER_LEAD_MINUTES", "5"))
+REMINDER_SCAN_SECONDS = int(os.getenv("REMINDER_SCAN_SECONDS", "60"))
+# Recipients per batch-send task (one SMTP session each)
+REMINDER_PAGE_SIZE = int(os.getenv("REMINDER_PAGE_SIZE", "500"))
+
+
+def claim_due_events(db, now=None) -> list[int]:
+    """
+    Mark events due for their reminder as sent and return their ids. The
+    fan-out tasks go through the outbox in the same transaction, so a claim
+    is never lost to a broker outage.
+    """
+    now = now or datetime.now(timezone.utc)
+    event_ids = db.execute(
+        update(Event)
+        .where(
+            Event.reminder_sent_at.is_(None),
+            Event.date > now,
+            Event.date <= now + timedelta(minutes=REMINDER_LEAD_MINUTES),
+        )
+        .values(reminder_sent_at=now)
+        .returning(Event.id)
+    ).scalars().all()
+    for event_id in event_ids:
+        outbox.enqueue(db, send_event_reminders, event_id)
+    db.commit()
+    return event_ids
+
+
+def dispatch_due_reminders():
+    """Claim due events and queue one fan-out task per event."""
+    db = SessionLocal()
+    try:
+        event_ids = claim_due_events(db)
+    finally:
+        db.close()
+    if event_ids:
+        print(f"⏰ Queued reminders for {len(event_ids)} event(s).")
+
+
+def iter_attendee_pages(db, event_id: int, page_size: int = REMINDER_PAGE_SIZE):
+    """Yield lists of distinct attendee emails, keyset-paginated by user id."""
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(User.id, User.email)
+            .join(Booking, Booking.customer_id == User.id)
+            .where(Booking.event_id == event_id, User.id > last_id)
+            .distinct()
+            .order_by(User.id)
+            .limit(page_size)
+        ).all()
+        if not rows:
+            return
+        last_id = rows[-1].id
+        yield [row.email for row in rows]
+
+
+@shared_task
+def send_event_reminders(event_id: int):
+    """Fan out an event's reminder to its current attendees, one batch task per page."""
+    db = SessionLocal()
+    try:
+        event = db.get(Event, event_id)
+        if event is None:
+            return "Event no longer exists"
+        event_time = event.date.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
+
+        batches = recipients = 0
+        for emails in iter_attendee_pages(db, event_id):
+            send_event_reminder_batch.delay(emails, event.title, event_time, event.venue)
+            batches += 1
+            recipients += len(emails)
+    finally:
+        db.close()
+    return f"Queued {batches} reminder batches for {recipients} attendees"
+
+
+def start_reminder_scheduler():
+    """Runs the due-reminder scan in background."""
+    scheduler = BackgroundScheduler()
+    scheduler.add_job(
+        dispatch_due_reminders,
+        "interval",
+        seconds=REMINDER_SCAN_SECONDS,
+        max_instances=1,
+        coalesce=True,
+    )
+    scheduler.start()
+    print(f"⏰ Event reminder scheduler started (every {REMINDER_SCAN_SECONDS}s).")
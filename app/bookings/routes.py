@@ -1,14 +1,19 @@
 from datetime import timedelta,datetime
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.models import Ticket, Booking, User, Event
-from app.bookings.schemas import BookingCreate, BookingResponse
+from app.bookings.schemas import BookingCreate, BulkBookingCreate, BookingResponse
+from app.bookings import inventory, hot_inventory
 from app.auth.dependencies import get_current_user
+from app.pagination import PageParams, keyset_paginate
 from datetime import datetime, timedelta, timezone
 
 from app.celery_worker import celery_app
-from app.utils.email_utils import send_booking_email, send_event_reminder_email
 
 
 
@@ -17,103 +22,68 @@ router = APIRouter(prefix="/bookings", tags=["Bookings"])
 
 # --- BOOK TICKET --- #
 @router.post("/", response_model=BookingResponse)
-def book_ticket(
+async def book_ticket(
     booking: BookingCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    # ✅ Fetch ticket
-    ticket = db.query(Ticket).filter(Ticket.id == booking.ticket_id).first()
-    if not ticket:
-        raise HTTPException(status_code=404, detail="Ticket not found")
-
-    # ✅ Fetch related event for title
-    event = db.query(Event).filter(Event.id == ticket.event_id).first()
-    if not event:
-        raise HTTPException(status_code=404, detail="Event not found")
-
-    # ✅ Check quantity
-    if ticket.quantity < booking.quantity:
-        raise HTTPException(status_code=400, detail="Not enough tickets available")
-
-    # ✅ Calculate total price
-    total_price = ticket.price * booking.quantity
-
-    # ✅ Create booking
-    new_booking = Booking(
-        customer_id=current_user.id,
-        event_id=event.id,
-        ticket_id=ticket.id,
-        quantity=booking.quantity,
-        total_price=total_price,
-    )
-
-    # ✅ Update ticket quantity
-    ticket.quantity -= booking.quantity
-    db.add(new_booking)
-    db.commit()
-    db.refresh(new_booking)
-
-    db.add(ticket)
-    db.commit()
-
-    # ✅ Send confirmation email asynchronously
-    send_booking_email.delay(
-        current_user.email,
-        event.title,       
-        booking.quantity,
-        total_price
+    # ✅ Flash-sale tickets are reserved on the hot counter and written back later
+    if hot_inventory.is_hot(booking.ticket_id):
+        reservation = await hot_inventory.reserve(current_user, booking.ticket_id, booking.quantity)
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=reservation)
+
+    # ✅ Reserve stock, create booking and queue its confirmation email in a
+    # single transaction; the outbox relay publishes the email off the request path
+    return await inventory.book_tickets(
+        db, current_user.id, booking.ticket_id, booking.quantity,
+        customer_email=current_user.email,
     )
 
-    reminder_time = event.date - timedelta(minutes=5)
-    current_utc = datetime.now(timezone.utc)
 
-    if reminder_time > current_utc:
-        send_event_reminder_email.apply_async(
-            args=[
-                current_user.email,
-                event.title,
-                event.date.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M UTC"),
-                event.venue,
-            ],
-            eta=reminder_time  # ✅ Celery uses UTC internally
-        )
-
-    return new_booking
+# --- BOOK SEVERAL TICKET TIERS AT ONCE --- #
+@router.post("/bulk", response_model=list[BookingResponse])
+async def book_tickets_bulk(
+    bulk: BulkBookingCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Book several tiers of one event in a single transaction."""
+    # ✅ One consolidated confirmation for the whole order, queued in the same transaction
+    return await inventory.book_tickets_bulk(
+        db, current_user.id, bulk.items, customer_email=current_user.email
+    )
 
 
 # --- CANCEL BOOKING --- #
 @router.delete("/{booking_id}", status_code=status.HTTP_204_NO_CONTENT)
-def cancel_booking(
+async def cancel_booking(
     booking_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    booking = db.query(Booking).filter(
-        Booking.id == booking_id, Booking.customer_id == current_user.id
-    ).first()
-
-    if not booking:
-        raise HTTPException(status_code=404, detail="Booking not found")
-
-    # Restore tickets
-    ticket = db.query(Ticket).filter(Ticket.id == booking.ticket_id).first()
-    ticket.quantity += booking.quantity
-
-    db.delete(booking)
-    db.commit()
-
-    db.add(ticket)
-    db.commit()
+    await inventory.cancel_booking(db, current_user.id, booking_id)
 
     return {"message": "Booking canceled successfully"}
 
 
 # --- GET ALL BOOKINGS FOR CURRENT USER --- #
 @router.get("/", response_model=list[BookingResponse])
-def get_user_bookings(
-    db: Session = Depends(get_db),
+async def get_user_bookings(
+    response: Response,
+    page: PageParams = Depends(),
+    event_id: Optional[int] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    bookings = db.query(Booking).filter(Booking.customer_id == current_user.id).all()
-    return bookings
+    """Newest bookings first; filter by event and booking date range."""
+    statement = select(Booking).where(Booking.customer_id == current_user.id)
+    if event_id is not None:
+        statement = statement.where(Booking.event_id == event_id)
+    if date_from is not None:
+        statement = statement.where(Booking.booking_date >= date_from)
+    if date_to is not None:
+        statement = statement.where(Booking.booking_date <= date_to)
+    return await keyset_paginate(db, statement, Booking.id, page, response, descending=True)
+
@@ -1,13 +1,16 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 
 class BookingBase(BaseModel):
     ticket_id: int
-    quantity: int
+    quantity: int = Field(..., gt=0)
 
 class BookingCreate(BookingBase):
     pass
 
+class BulkBookingCreate(BaseModel):
+    items: list[BookingCreate] = Field(..., min_length=1)
+
 class BookingResponse(BaseModel):
     id: int
     ticket_id: int
@@ -16,4 +19,4 @@ class BookingResponse(BaseModel):
     booking_date: datetime
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
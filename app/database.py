@@ -1,20 +1,160 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.concurrency import run_in_threadpool
 import os
 from dotenv import load_dotenv
 
+from app.pool_metrics import PoolMetrics, attach_pool_events, instrumented_pool_class
+
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
+# "sync": routes talk to Postgres through the threadpool (psycopg2)
+# "async": routes use a native async driver on the event loop (asyncpg)
+DB_MODE = os.getenv("DB_MODE", "sync").lower()
+
+
+def _to_async_url(url: str) -> str:
+    """Swap the sync driver in DATABASE_URL for its async counterpart."""
+    for sync_prefix, async_prefix in (
+        ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("postgres://", "postgresql+asyncpg://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+    ):
+        if url.startswith(sync_prefix):
+            return async_prefix + url[len(sync_prefix):]
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _to_async_url(DATABASE_URL)
+
+# --- Connection pool settings (per worker process) --- #
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+sync_pool_metrics = PoolMetrics("sync")
+async_pool_metrics = PoolMetrics("async")
+
+
+def _pool_options(url: str, base_pool, metrics: PoolMetrics) -> dict:
+    """Engine kwargs for an instrumented, settings-driven queue pool."""
+    if url.startswith("sqlite"):
+        # SQLite picks its own pool class; sizing knobs do not apply
+        return {}
+    return {
+        "poolclass": instrumented_pool_class(base_pool, metrics),
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+# Sync engine: used by sync mode, Celery tasks, RAG indexing and schema setup
+engine = create_engine(DATABASE_URL, **_pool_options(DATABASE_URL, QueuePool, sync_pool_metrics))
+attach_pool_events(engine, sync_pool_metrics)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
\ No newline at end of file
+async_engine = (
+    create_async_engine(
+        ASYNC_DATABASE_URL,
+        **_pool_options(ASYNC_DATABASE_URL, AsyncAdaptedQueuePool, async_pool_metrics),
+    )
+    if DB_MODE == "async" else None
+)
+if async_engine is not None:
+    attach_pool_events(async_engine.sync_engine, async_pool_metrics)
+AsyncSessionLocal = (
+    async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    if async_engine is not None else None
+)
+
+# Request sessions in sync mode; same expiry semantics as the async ones
+_ThreadedSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+)
+
+
+class ThreadedSession:
+    """
+    AsyncSession-compatible facade over a sync Session.
+
+    Lets the routers be written once against the async API while DB_MODE=sync
+    keeps every database call on Starlette's threadpool, so both modes can be
+    benchmarked under the same load.
+    """
+
+    def __init__(self, session):
+        self.sync_session = session
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    def expunge(self, instance):
+        self.sync_session.expunge(instance)
+
+    async def execute(self, statement, params=None, **kwargs):
+        return await run_in_threadpool(self.sync_session.execute, statement, params, **kwargs)
+
+    async def scalar(self, statement, params=None, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, statement, params, **kwargs)
+
+    async def scalars(self, statement, params=None, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalars, statement, params, **kwargs)
+
+    async def get(self, entity, ident, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kwargs)
+
+    async def delete(self, instance):
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def flush(self, objects=None):
+        await run_in_threadpool(self.sync_session.flush, objects)
+
+    async def refresh(self, instance, attribute_names=None):
+        await run_in_threadpool(self.sync_session.refresh, instance, attribute_names)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+
+async def get_db():
+    if DB_MODE == "async":
+        async with AsyncSessionLocal() as db:
+            yield db
+    else:
+        db = ThreadedSession(_ThreadedSessionLocal())
+        try:
+            yield db
+        finally:
+            await db.close()
+
+
+def get_pool_stats() -> list[dict]:
+    """Live pool usage for every engine this process has built."""
+    stats = [sync_pool_metrics.snapshot()]
+    if async_engine is not None:
+        stats.append(async_pool_metrics.snapshot())
+    return stats
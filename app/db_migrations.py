@@ -0,0 +1,66 @@
+import fcntl
+import os
+import tempfile
+from contextlib import contextmanager
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text
+
+from app.database import engine
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Arbitrary app-wide key for the PostgreSQL advisory lock around upgrades
+MIGRATION_LOCK_KEY = 720_431_905
+MIGRATION_LOCK_FILE = os.path.join(tempfile.gettempdir(), "event-app-migrations.lock")
+
+
+def _alembic_config() -> Config:
+    config = Config(os.path.join(ROOT_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT_DIR, "migrations"))
+    return config
+
+
+@contextmanager
+def migration_lock():
+    """
+    Let one process at a time migrate: a session-level advisory lock on
+    PostgreSQL, a file lock otherwise (SQLite is single-host anyway).
+    """
+    if engine.dialect.name == "postgresql":
+        # Autocommit, so the waiting session holds no snapshot that
+        # CREATE INDEX CONCURRENTLY would have to wait out
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    else:
+        with open(MIGRATION_LOCK_FILE, "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def run_migrations(revision: str = "head"):
+    """
+    Apply Alembic migrations up to `revision`. Safe to call from every
+    worker at once: the first one migrates, the rest find nothing to do.
+    """
+    with migration_lock():
+        command.upgrade(_alembic_config(), revision)
+    print(f"✅ Database migrated to {revision}.")
+
+
+def downgrade_migrations(revision: str):
+    """Roll the schema back to `revision`."""
+    command.downgrade(_alembic_config(), revision)
+    print(f"↩️ Database downgraded to {revision}.")
+
+
+if __name__ == "__main__":
+    # Pre-start step: `python -m app.db_migrations` before launching the workers
+    run_migrations()
@@ -1,20 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import json
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 import pytz
 
 from app.database import get_db
 from app.models import Event, User
-from app.events.schemas import EventCreate, EventResponse
+from app.events.schemas import EventCreate, EventResponse, EventSearchResult
+from app.events.search import search_events
 from app.auth.dependencies import  get_current_user
+from app.rag.auto_refresh import request_index_sync
+from app.pagination import PageParams, MAX_PAGE_SIZE, decode_cursor, keyset_paginate
 
 router = APIRouter(prefix="/events", tags=["Events"])
 
+# Events loaded per round-trip while streaming /events/with-tickets
+WITH_TICKETS_BATCH_SIZE = 500
+
+
+def filter_events(statement, date_from: Optional[datetime], date_to: Optional[datetime]):
+    """Apply the optional event date range filter."""
+    if date_from is not None:
+        statement = statement.where(Event.date >= date_from)
+    if date_to is not None:
+        statement = statement.where(Event.date <= date_to)
+    return statement
+
 
 # --- CREATE EVENT (Organizer only) --- #
 @router.post("/", response_model=EventResponse)
-def create_event(
+async def create_event(
     event: EventCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     import pytz
@@ -39,101 +62,184 @@ def create_event(
     )
 
     db.add(new_event)
-    db.commit()
-    db.refresh(new_event)
+    await db.commit()
+    await db.refresh(new_event)
+    request_index_sync()
 
     return new_event
 
 # --- GET ALL EVENTS (any logged-in user) --- #
 @router.get("/", response_model=list[EventResponse])
-def get_all_events(
-    db: Session = Depends(get_db),
+async def get_all_events(
+    response: Response,
+    page: PageParams = Depends(),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    organizer_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    events = db.query(Event).all()
-    return events
+    statement = filter_events(select(Event), date_from, date_to)
+    if organizer_id is not None:
+        statement = statement.where(Event.organizer_id == organizer_id)
+    return await keyset_paginate(db, statement, Event.id, page, response)
 
 
 # --- GET EVENTS CREATED BY ORGANIZER --- #
 @router.get("/my-events", response_model=list[EventResponse])
-def get_my_events(
-    db: Session = Depends(get_db),
+async def get_my_events(
+    response: Response,
+    page: PageParams = Depends(),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """Organizer can view only their own created events."""
-    events = db.query(Event).filter(Event.organizer_id == current_user.id).all()
-    return events
+    statement = select(Event).where(Event.organizer_id == current_user.id)
+    statement = filter_events(statement, date_from, date_to)
+    return await keyset_paginate(db, statement, Event.id, page, response)
+
+
+# --- SEARCH EVENTS (any logged-in user) --- #
+@router.get("/search", response_model=list[EventSearchResult])
+async def search(
+    response: Response,
+    q: Optional[str] = Query(None, min_length=1, max_length=200, description="Words to match in title, venue and description"),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    price_min: Optional[float] = Query(None, ge=0),
+    price_max: Optional[float] = Query(None, ge=0),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Full-text search over events, best matches first. Date and price facets
+    narrow the results (an event matches the price range if any of its
+    tickets does); each result carries its ticket price range.
+    """
+    if price_min is not None and price_max is not None and price_min > price_max:
+        raise HTTPException(status_code=400, detail="price_min cannot be greater than price_max")
+    return await search_events(db, q, date_from, date_to, price_min, price_max, page, response)
 
 
 # --- UPDATE EVENT (Organizer only) --- #
 @router.put("/{event_id}", response_model=EventResponse)
-def update_event(
+async def update_event(
     event_id: int,
     event: EventCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    existing_event = db.query(Event).filter(
+    existing_event = await db.scalar(select(Event).where(
         Event.id == event_id, Event.organizer_id == current_user.id
-    ).first()
+    ))
 
     if not existing_event:
         raise HTTPException(status_code=404, detail="Event not found or not authorized")
 
+    previous_date = existing_event.date
     for key, value in event.dict().items():
         setattr(existing_event, key, value)
+    if existing_event.date != previous_date:
+        # Rescheduled: remind attendees again relative to the new date
+        existing_event.reminder_sent_at = None
 
-    db.commit()
-    db.refresh(existing_event)
+    await db.commit()
+    await db.refresh(existing_event)
+    request_index_sync()
     return existing_event
 
 
 # --- DELETE EVENT (Organizer only) --- #
 @router.delete("/{event_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_event(
+async def delete_event(
     event_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    event = db.query(Event).filter(
+    event = await db.scalar(select(Event).where(
         Event.id == event_id, Event.organizer_id == current_user.id
-    ).first()
+    ))
 
     if not event:
         raise HTTPException(status_code=404, detail="Event not found or not authorized")
 
-    db.delete(event)
-    db.commit()
+    await db.delete(event)
+    await db.commit()
+    request_index_sync()
     return {"message": "Event deleted successfully"}
 
 
 
 @router.get("/with-tickets")
-def get_events_with_tickets(db: Session = Depends(get_db)):
-    events = db.query(Event).all()
+async def get_events_with_tickets(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Stream events with their tickets as a JSON array.
+
+    Tickets are eager-loaded per batch (two queries per batch, no N+1) and
+    events are serialized one at a time, so memory stays flat however large
+    the catalog is. Without `limit` the whole catalog is streamed; with it a
+    single page is returned and X-Next-Cursor points at the next one.
+    """
+    statement = select(Event).options(selectinload(Event.tickets))
+
+    if limit is not None:
+        first = await keyset_paginate(db, statement, Event.id, PageParams(cursor, limit), response)
+    else:
+        after = decode_cursor(cursor) if cursor is not None else None
+        first = await _event_batch(db, statement, after)
 
-    if not events:
+    if not first and cursor is None:
         raise HTTPException(status_code=404, detail="No events found")
 
-    result = []
-    for event in events:
-        event_data = {
-            "id": event.id,
-            "title": event.title,
-            "description": event.description,
-            "date": event.date,
-            "venue": event.venue,
-            "organizer_id": event.organizer_id,
-            "tickets": [
-                {
-                    "id": ticket.id,
-                    "type": ticket.type,
-                    "price": ticket.price,
-                    "quantity": ticket.quantity
-                }
-                for ticket in event.tickets
-            ],
-        }
-        result.append(event_data)
-
-    return result
+    return StreamingResponse(
+        _stream_events(db, statement, first, stream_all=limit is None),
+        media_type="application/json",
+        headers=dict(response.headers),
+    )
+
+
+async def _event_batch(db: AsyncSession, statement, after):
+    """Load the next id-ordered batch of events after the `after` key."""
+    if after is not None:
+        statement = statement.where(Event.id > after)
+    statement = statement.order_by(Event.id).limit(WITH_TICKETS_BATCH_SIZE)
+    return (await db.scalars(statement)).all()
+
+
+async def _stream_events(db: AsyncSession, statement, batch, stream_all: bool):
+    yield "["
+    first = True
+    while batch:
+        for event in batch:
+            event_data = {
+                "id": event.id,
+                "title": event.title,
+                "description": event.description,
+                "date": event.date,
+                "venue": event.venue,
+                "organizer_id": event.organizer_id,
+                "tickets": [
+                    {
+                        "id": ticket.id,
+                        "type": ticket.type,
+                        "price": ticket.price,
+                        "quantity": ticket.quantity
+                    }
+                    for ticket in event.tickets
+                ],
+            }
+            yield ("" if first else ",") + json.dumps(jsonable_encoder(event_data))
+            first = False
+
+        if not stream_all:
+            break
+        batch = await _event_batch(db, statement, batch[-1].id)
+    yield "]"
@@ -23,3 +23,10 @@ class EventResponse(EventBase):
 
     class Config:
         from_attributes = True
+
+
+# --- SEARCH RESULT --- #
+class EventSearchResult(EventResponse):
+    rank: float
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
@@ -0,0 +1,180 @@
+"""
+Full-text event search with date and price facets.
+
+On PostgreSQL, matching runs against events.search_vector, a stored
+tsvector over title (weight A), venue (B) and description (C) with a GIN
+index (migration 0005). Results are ranked with ts_rank_cd. The price facet
+is an EXISTS probe on the (event_id, price) ticket index, so neither filter
+scans the catalog. On SQLite (tests and local dev) the same query falls back
+to case-insensitive LIKE matching, ranked by the field each term hits.
+
+Pages are keyset-paginated on (rank, id). The rank is an exact numeric,
+rounded to RANK_SCALE places, so the cursor compares against the same value
+the database sorted on. Ranked searches still score and sort every match on
+each page; the cursor only keeps pages stable and free of OFFSET.
+"""
+import re
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Optional
+
+from fastapi import HTTPException, Response
+from sqlalchemy import Numeric, and_, case, cast, func, literal, literal_column, or_, select, type_coerce
+from sqlalchemy.sql.expression import ColumnElement
+
+from app.database import engine
+from app.models import Event, Ticket
+from app.pagination import NEXT_CURSOR_HEADER, PageParams, decode_cursor, encode_cursor
+
+# Must match the text search configuration used by migration 0005
+SEARCH_LANGUAGE = "english"
+# Terms beyond this are ignored by the SQLite fallback
+MAX_FALLBACK_TERMS = 8
+# Decimal places kept of ts_rank_cd, which is a float4
+RANK_SCALE = 6
+
+_TERM_RE = re.compile(r"\w+")
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _postgres_match(q: str) -> tuple[ColumnElement, ColumnElement]:
+    vector = literal_column("events.search_vector")
+    query = func.websearch_to_tsquery(SEARCH_LANGUAGE, q)
+    rank = func.round(cast(func.ts_rank_cd(vector, query), Numeric), RANK_SCALE, type_=Numeric)
+    return vector.op("@@")(query), rank
+
+
+def _fallback_match(q: str) -> tuple[ColumnElement, ColumnElement]:
+    terms = _TERM_RE.findall(q.lower())[:MAX_FALLBACK_TERMS]
+    if not terms:
+        raise HTTPException(status_code=400, detail="Search query has no searchable terms")
+
+    fields = [
+        (func.lower(Event.title), 3),
+        (func.lower(func.coalesce(Event.venue, "")), 2),
+        (func.lower(func.coalesce(Event.description, "")), 1),
+    ]
+    conditions, rank = [], literal(0)
+    for term in terms:
+        pattern = f"%{_escape_like(term)}%"
+        hits = [(column.like(pattern, escape="\\"), weight) for column, weight in fields]
+        # Every term has to appear somewhere, like the tsquery AND
+        conditions.append(or_(*(hit for hit, _ in hits)))
+        for hit, weight in hits:
+            rank = rank + case((hit, weight), else_=0)
+    # Integer weights are exact already; typed as Numeric like the tsvector rank
+    return and_(*conditions), type_coerce(rank, Numeric)
+
+
+def search_statement(
+    q: Optional[str],
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    price_min: Optional[float] = None,
+    price_max: Optional[float] = None,
+    after: Optional[list] = None,
+    limit: int = 50,
+    dialect: Optional[str] = None,
+):
+    """
+    Build the ranked search query, selecting (Event, rank) rows. `after` is
+    the (Decimal rank, id) key of the previous page's last row.
+    """
+    dialect = dialect or engine.dialect.name
+
+    if q:
+        match, rank = _postgres_match(q) if dialect == "postgresql" else _fallback_match(q)
+        statement = select(Event, rank.label("rank")).where(match)
+    else:
+        # Facets only: newest ids first
+        rank = literal(0, Numeric)
+        statement = select(Event, rank.label("rank"))
+
+    if date_from is not None:
+        statement = statement.where(Event.date >= date_from)
+    if date_to is not None:
+        statement = statement.where(Event.date <= date_to)
+
+    if price_min is not None or price_max is not None:
+        ticket_filter = [Ticket.event_id == Event.id]
+        if price_min is not None:
+            ticket_filter.append(Ticket.price >= price_min)
+        if price_max is not None:
+            ticket_filter.append(Ticket.price <= price_max)
+        statement = statement.where(select(Ticket.id).where(*ticket_filter).exists())
+
+    if after is not None:
+        last_rank, last_id = after
+        last_rank = literal(last_rank, Numeric)
+        statement = statement.where(or_(rank < last_rank, and_(rank == last_rank, Event.id < last_id)))
+
+    return statement.order_by(rank.desc(), Event.id.desc()).limit(limit)
+
+
+def _decode_search_cursor(cursor: str) -> list:
+    # The rank travels as a decimal string so it round-trips exactly
+    key = decode_cursor(cursor, key_type=list)
+    if len(key) != 2 or not isinstance(key[0], str) or not isinstance(key[1], int) or isinstance(key[1], bool):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    try:
+        rank = Decimal(key[0])
+    except InvalidOperation:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    if not rank.is_finite():
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    return [rank, key[1]]
+
+
+async def price_ranges(db, event_ids: list[int]) -> dict[int, tuple[float, float]]:
+    """Min and max ticket price for each of the given events."""
+    if not event_ids:
+        return {}
+    rows = (await db.execute(
+        select(Ticket.event_id, func.min(Ticket.price), func.max(Ticket.price))
+        .where(Ticket.event_id.in_(event_ids))
+        .group_by(Ticket.event_id)
+    )).all()
+    return {event_id: (low, high) for event_id, low, high in rows}
+
+
+async def search_events(
+    db,
+    q: Optional[str],
+    date_from: Optional[datetime],
+    date_to: Optional[datetime],
+    price_min: Optional[float],
+    price_max: Optional[float],
+    page: PageParams,
+    response: Response,
+) -> list[dict]:
+    """Return one ranked page of matching events with their ticket price range."""
+    after = _decode_search_cursor(page.cursor) if page.cursor is not None else None
+
+    # Fetch one extra row to know whether another page exists
+    rows = (await db.execute(search_statement(
+        q, date_from, date_to, price_min, price_max, after, page.limit + 1
+    ))).all()
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        last_event, last_rank = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([str(last_rank), last_event.id])
+
+    prices = await price_ranges(db, [event.id for event, _ in rows])
+    results = []
+    for event, rank in rows:
+        low, high = prices.get(event.id, (None, None))
+        results.append({
+            "id": event.id,
+            "title": event.title,
+            "description": event.description,
+            "date": event.date,
+            "venue": event.venue,
+            "organizer_id": event.organizer_id,
+            "rank": float(rank),
+            "min_price": low,
+            "max_price": high,
+        })
+    return results
@@ -1,5 +1,6 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from app.database import Base, engine
+from starlette.concurrency import run_in_threadpool
+from app.database import get_pool_stats
 
 # Import routers
 from app.auth.routes import router as auth_router
@@ -8,15 +9,29 @@ from app.tickets.routes import router as ticket_router
 from app.bookings.routes import router as booking_router
 
 # Import RAG & Auto Refresh
-from app.rag.query_rag import get_rag_chain
+from app.rag import answer_cache
+from app.rag.query_rag import get_rag_chain, get_live_chain
+from app.rag.streaming import coalesce_tokens
 from app.rag.auto_refresh import start_auto_refresh
+from app.bookings.hot_inventory import HOT_TICKET_IDS, start_hot_inventory_reconciler
+from app.bookings.reminders import start_reminder_scheduler
+from app.outbox import OUTBOX_RELAY_IN_APP, start_outbox_relay
+from app.auth.hashing import shutdown_hash_executor
+from app.db_migrations import run_migrations
 
 import asyncio
+import os
+
+# Frames buffered per WebSocket before generation waits for the client
+WS_SEND_QUEUE_SIZE = int(os.getenv("RAG_WS_SEND_QUEUE_SIZE", "32"))
 
 app = FastAPI(title="Event Management + Gemini RAG")
 
-# Initialize database tables
-Base.metadata.create_all(bind=engine)
+# Schema is managed by Alembic (`python -m app.db_migrations` as a pre-start
+# step); RUN_MIGRATIONS_ON_STARTUP=true applies pending migrations on boot,
+# one worker at a time under a lock
+if os.getenv("RUN_MIGRATIONS_ON_STARTUP", "false").lower() == "true":
+    run_migrations()
 
 # Include routes
 app.include_router(auth_router)
@@ -30,12 +45,46 @@ try:
 except Exception as e:
     print(f"⚠️ Auto-refresh failed to start: {e}")
 
+# ✅ Write-behind reconciler for flash-sale (hot inventory) tickets
+if HOT_TICKET_IDS:
+    start_hot_inventory_reconciler()
+
+# ✅ Outbox relay (or run `python -m app.outbox` as its own process)
+if OUTBOX_RELAY_IN_APP:
+    start_outbox_relay()
+
+# ✅ Per-event reminder fan-out (claims are atomic, so every process may run it)
+try:
+    start_reminder_scheduler()
+except Exception as e:
+    print(f"⚠️ Reminder scheduler failed to start: {e}")
+
+
+@app.on_event("startup")
+async def warm_rag_chain():
+    """Build the shared RAG chain before the first WebSocket connects."""
+    try:
+        await run_in_threadpool(get_rag_chain)
+    except Exception as e:
+        print(f"⚠️ RAG chain warm-up failed: {e}")
+
+
+@app.on_event("shutdown")
+def stop_hash_executor():
+    shutdown_hash_executor()
+
 
 @app.get("/")
 def root():
     return {"message": "FastAPI + Gemini RAG is connected and running!"}
 
 
+@app.get("/metrics/db-pool")
+def db_pool_metrics():
+    """Connection pool saturation for this worker process."""
+    return {"pools": get_pool_stats()}
+
+
 # ---------------------------------
 # 🧠 WebSocket Endpoint for RAG Chat
 # ---------------------------------
@@ -43,29 +92,72 @@ def root():
 async def rag_chat(websocket: WebSocket):
     """Real-time Gemini RAG chat via WebSocket."""
     await websocket.accept()
-    await websocket.send_text("✅ Connected to Gemini RAG! Ask your question.\n")
 
-    # Load chain once per session
-    rag_chain = get_rag_chain()
+    # Bounded outbox: a slow client makes generation wait instead of buffering without limit
+    frames = asyncio.Queue(maxsize=WS_SEND_QUEUE_SIZE)
+    sender = asyncio.create_task(_send_frames(websocket, frames))
+    answering = None
+
+    await frames.put("✅ Connected to Gemini RAG! Ask your question.\n")
 
     try:
         while True:
-            # Wait for message
+            # Keep listening while an answer streams, so a new question can preempt it
             question = await websocket.receive_text()
-            await websocket.send_text(f" You: {question}\n")
 
-            # Stream Gemini response asynchronously
-            response_text = ""
-            for chunk in rag_chain.stream(question):
-                response_text += chunk
-                await websocket.send_text(chunk)
-                # small sleep to avoid flooding client with too many messages
-                await asyncio.sleep(0.01)
+            if answering is not None and not answering.done():
+                answering.cancel()
+                await asyncio.gather(answering, return_exceptions=True)
+                # Drop frames of the abandoned answer that were not sent yet
+                while not frames.empty():
+                    frames.get_nowait()
 
-            await websocket.send_text(f"\n Final Answer:\n{response_text}\n")
+            answering = asyncio.create_task(_answer(question, frames))
 
     except WebSocketDisconnect:
         print("🔌 WebSocket disconnected.")
     except Exception as e:
         print(f"❌ Error in RAG WebSocket: {e}")
         await websocket.close()
+    finally:
+        if answering is not None:
+            answering.cancel()
+        sender.cancel()
+        await asyncio.gather(*(t for t in (answering, sender) if t is not None), return_exceptions=True)
+
+
+async def _send_frames(websocket: WebSocket, frames: asyncio.Queue):
+    while True:
+        await websocket.send_text(await frames.get())
+
+
+async def _answer(question: str, frames: asyncio.Queue):
+    await frames.put(f" You: {question}\n")
+    try:
+        # Process-wide chain; picks up a rebuilt index between questions
+        version, rag_chain = await run_in_threadpool(get_live_chain)
+
+        # Repeated (or near-identical) questions are answered from cache
+        cached = await run_in_threadpool(answer_cache.lookup, question, version)
+        if cached is not None:
+            await frames.put(cached + "\n")
+            return
+
+        # Stream Gemini tokens without blocking the event loop, grouped into frames
+        parts = []
+        stream = coalesce_tokens(rag_chain.astream(question))
+        try:
+            async for frame in stream:
+                parts.append(frame)
+                await frames.put(frame)
+        finally:
+            # Stops the model call too when the answer is cancelled
+            await stream.aclose()
+        await frames.put("\n")
+
+        await run_in_threadpool(answer_cache.store, question, version, "".join(parts))
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(f"❌ Error answering RAG question: {e}")
+        await frames.put("⚠️ Sorry, something went wrong while answering.\n")
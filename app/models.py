@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime, Index, Text
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime, timezone
@@ -21,13 +21,21 @@ class User(Base):
 # --- EVENT MODEL ---
 class Event(Base):
     __tablename__ = "events"
+    __table_args__ = (
+        # get_my_events: filter by organizer, keyset-paginate by id
+        Index("ix_events_organizer_id_id", "organizer_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
     description = Column(String)
-    date = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    date = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True)
     venue = Column(String)
+    # On PostgreSQL the table also has a generated `search_vector` tsvector
+    # (migration 0005) used by /events/search; it is not mapped here
     organizer_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # Set when the reminder fan-out is claimed; cleared if the date moves
+    reminder_sent_at = Column(DateTime(timezone=True), nullable=True)
 
     organizer = relationship("User", back_populates="events")
     tickets = relationship("Ticket", back_populates="event", cascade="all, delete")
@@ -37,12 +45,16 @@ class Event(Base):
 # --- TICKET MODEL ---
 class Ticket(Base):
     __tablename__ = "tickets"
+    __table_args__ = (
+        # Price facet of /events/search: EXISTS probe per candidate event
+        Index("ix_tickets_event_id_price", "event_id", "price"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     type = Column(String, nullable=False)  # General, VIP, etc.
     price = Column(Float, nullable=False)
     quantity = Column(Integer, nullable=False)
-    event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
+    event_id = Column(Integer, ForeignKey("events.id"), nullable=False, index=True)
 
     event = relationship("Event", back_populates="tickets")
     bookings = relationship("Booking", back_populates="ticket")
@@ -51,15 +63,41 @@ class Ticket(Base):
 # --- BOOKING MODEL ---
 class Booking(Base):
     __tablename__ = "bookings"
+    __table_args__ = (
+        # get_user_bookings: filter by customer, keyset-paginate by id
+        Index("ix_bookings_customer_id_id", "customer_id", "id"),
+        # customer bookings within a booking date range
+        Index("ix_bookings_customer_id_booking_date", "customer_id", "booking_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     customer_id = Column(Integer, ForeignKey("users.id"))
-    event_id = Column(Integer, ForeignKey("events.id"))
-    ticket_id = Column(Integer, ForeignKey("tickets.id"))
+    event_id = Column(Integer, ForeignKey("events.id"), index=True)
+    ticket_id = Column(Integer, ForeignKey("tickets.id"), index=True)
     quantity = Column(Integer)
     total_price = Column(Float)
     booking_date = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    # Set by the hot-inventory write-back so a replayed batch inserts nothing twice
+    reservation_id = Column(String, nullable=True, unique=True, index=True)
 
     customer = relationship("User", back_populates="bookings")
     event = relationship("Event", back_populates="bookings")
     ticket = relationship("Ticket", back_populates="bookings")
+
+
+# --- OUTBOX MODEL ---
+class OutboxMessage(Base):
+    """A Celery task to publish, written in the same transaction as the change that caused it."""
+    __tablename__ = "outbox"
+    __table_args__ = (
+        # Relay polls the oldest due messages
+        Index("ix_outbox_available_at_id", "available_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    task = Column(String, nullable=False)       # registered Celery task name
+    payload = Column(Text, nullable=False)      # JSON list of positional args
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    last_error = Column(String)
@@ -0,0 +1,133 @@
+"""
+Transactional outbox for Celery side effects.
+
+Request handlers call `enqueue(db, task, *args)` before committing, so the
+message is stored atomically with the booking (or anything else) that
+caused it and never touches the broker on the request path. The relay
+publishes due messages in batches over one broker connection and deletes
+them once sent. A failed publish is retried with exponential backoff; a
+message is parked after OUTBOX_MAX_ATTEMPTS.
+
+Delivery is at-least-once: a crash between publishing and deleting sends
+that batch again.
+
+Run the relay in-app (OUTBOX_RELAY_IN_APP=true, the default) or as its own
+process with `python -m app.outbox`. Several relays can run side by side
+on PostgreSQL (rows are claimed with SKIP LOCKED).
+"""
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from apscheduler.schedulers.background import BackgroundScheduler
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.celery_worker import celery_app
+from app.database import SessionLocal
+from app.models import OutboxMessage
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "200"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "1"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+OUTBOX_RETRY_BASE_SECONDS = float(os.getenv("OUTBOX_RETRY_BASE_SECONDS", "2"))
+OUTBOX_RETRY_MAX_SECONDS = float(os.getenv("OUTBOX_RETRY_MAX_SECONDS", "300"))
+OUTBOX_RELAY_IN_APP = os.getenv("OUTBOX_RELAY_IN_APP", "true").lower() == "true"
+
+
+def enqueue(db, task, *args):
+    """
+    Add a task to the outbox of the current transaction (sync or async
+    session); it is published only if the transaction commits.
+    """
+    name = task if isinstance(task, str) else task.name
+    db.add(OutboxMessage(task=name, payload=json.dumps(list(args))))
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1), OUTBOX_RETRY_MAX_SECONDS))
+
+
+def relay_once(batch_size: int = OUTBOX_BATCH_SIZE) -> int:
+    """Publish one batch of due messages; returns how many were published."""
+    db: Session = SessionLocal()
+    try:
+        now = datetime.now(timezone.utc)
+        messages = db.scalars(
+            select(OutboxMessage)
+            .where(OutboxMessage.available_at <= now, OutboxMessage.attempts < OUTBOX_MAX_ATTEMPTS)
+            .order_by(OutboxMessage.available_at, OutboxMessage.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not messages:
+            return 0
+
+        published = []
+        with celery_app.producer_or_acquire() as producer:
+            for message in messages:
+                try:
+                    # No kombu-level retries: the outbox backoff owns retrying
+                    celery_app.send_task(
+                        message.task, args=json.loads(message.payload), producer=producer, retry=False
+                    )
+                    published.append(message.id)
+                except Exception as e:
+                    message.attempts += 1
+                    message.available_at = now + _retry_delay(message.attempts)
+                    message.last_error = str(e)[:500]
+                    if message.attempts >= OUTBOX_MAX_ATTEMPTS:
+                        print(f"❌ Outbox message {message.id} ({message.task}) parked after {message.attempts} attempts: {e}")
+                    # Most likely the broker is down; leave the rest for the next round
+                    break
+
+        if published:
+            db.execute(delete(OutboxMessage).where(OutboxMessage.id.in_(published)))
+        db.commit()
+        return len(published)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def relay_pending(batch_size: int = OUTBOX_BATCH_SIZE) -> int:
+    """Publish batches until the outbox has no due messages left."""
+    total = 0
+    while True:
+        try:
+            published = relay_once(batch_size)
+        except Exception as e:
+            print(f"❌ Outbox relay failed: {e}")
+            return total
+        total += published
+        if published < batch_size:
+            return total
+
+
+def run_relay(poll_seconds: float = OUTBOX_POLL_SECONDS):
+    """Standalone relay loop."""
+    print(f"📤 Outbox relay running (poll every {poll_seconds}s).")
+    while True:
+        relay_pending()
+        time.sleep(poll_seconds)
+
+
+def start_outbox_relay():
+    """Runs the relay in background inside the app process."""
+    scheduler = BackgroundScheduler()
+    scheduler.add_job(
+        relay_pending,
+        "interval",
+        seconds=OUTBOX_POLL_SECONDS,
+        max_instances=1,
+        coalesce=True,
+    )
+    scheduler.start()
+    print(f"📤 Outbox relay started (every {OUTBOX_POLL_SECONDS}s).")
+
+
+if __name__ == "__main__":
+    run_relay()
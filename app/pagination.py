@@ -0,0 +1,65 @@
+import base64
+import json
+import os
+from typing import Optional
+
+from fastapi import HTTPException, Query, Response
+
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "200"))
+
+# Response header carrying the opaque token for the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams:
+    """Query parameters shared by every paginated list endpoint."""
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="Token from the previous page's X-Next-Cursor header"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    ):
+        self.cursor = cursor
+        self.limit = limit
+
+
+def encode_cursor(last_key) -> str:
+    raw = json.dumps({"k": last_key}).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str, key_type: type = int):
+    """Last key of the previous page; a tampered cursor or key of the wrong type is a 400."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))["k"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    # bool is an int subclass, but never a valid key
+    if not isinstance(key, key_type) or isinstance(key, bool):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    return key
+
+
+async def keyset_paginate(db, statement, key_column, page: PageParams, response: Response, descending: bool = False):
+    """
+    Return one page of the `statement` rows ordered on the indexed `key_column`.
+
+    Seeks past the last key of the previous page instead of using OFFSET, so
+    every page costs the same no matter how deep the client goes. The token
+    for the next page is set on the response header; it is absent on the
+    last page.
+    """
+    if page.cursor is not None:
+        last_key = decode_cursor(page.cursor)
+        statement = statement.where(key_column < last_key if descending else key_column > last_key)
+
+    statement = statement.order_by(key_column.desc() if descending else key_column.asc())
+
+    # Fetch one extra row to know whether another page exists
+    rows = (await db.scalars(statement.limit(page.limit + 1))).all()
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(getattr(rows[-1], key_column.key))
+
+    return rows
@@ -0,0 +1,102 @@
+"""Connection pool instrumentation exported through GET /metrics/db-pool."""
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+
+class PoolMetrics:
+    """Thread-safe counters for one connection pool."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.engine = None
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.connections_opened = 0
+        self.connections_invalidated = 0
+        self.peak_in_use = 0
+        self.peak_overflow = 0
+
+    def record_wait(self, seconds: float, timed_out: bool):
+        with self._lock:
+            if timed_out:
+                self.checkout_timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def snapshot(self) -> dict:
+        pool = self.engine.pool if self.engine is not None else None
+        if not isinstance(pool, QueuePool):
+            # Unsized pools (e.g. SQLite's) only report the counters
+            pool = None
+        in_use = pool.checkedout() if pool is not None else 0
+        overflow = max(pool.overflow(), 0) if pool is not None else 0
+        with self._lock:
+            waits = self.checkouts + self.checkout_timeouts
+            return {
+                "pool": self.name,
+                "size": pool.size() if pool is not None else 0,
+                "idle": pool.checkedin() if pool is not None else 0,
+                "in_use": in_use,
+                "overflow_in_use": overflow,
+                "peak_in_use": self.peak_in_use,
+                "peak_overflow": self.peak_overflow,
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.checkout_timeouts,
+                "checkout_wait_ms_avg": round(1000 * self.wait_seconds_total / waits, 3) if waits else 0.0,
+                "checkout_wait_ms_max": round(1000 * self.wait_seconds_max, 3),
+                "connections_opened": self.connections_opened,
+                "connections_invalidated": self.connections_invalidated,
+            }
+
+
+def instrumented_pool_class(base, metrics: PoolMetrics):
+    """
+    Subclass `base` so every checkout is timed, including time spent queued
+    for a free connection. Pools recreated on dispose keep the same metrics.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = base._do_get(self)
+        except exc.TimeoutError:
+            metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        metrics.record_wait(time.perf_counter() - start, timed_out=False)
+        return conn
+
+    return type(f"Instrumented{base.__name__}", (base,), {"_do_get": _do_get})
+
+
+def attach_pool_events(engine, metrics: PoolMetrics):
+    """Track live pool usage through SQLAlchemy pool events on a sync Engine."""
+    metrics.engine = engine
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        with metrics._lock:
+            metrics.connections_opened += 1
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        pool = engine.pool
+        if not isinstance(pool, QueuePool):
+            return
+        in_use = pool.checkedout()
+        overflow = max(pool.overflow(), 0)
+        with metrics._lock:
+            metrics.peak_in_use = max(metrics.peak_in_use, in_use)
+            metrics.peak_overflow = max(metrics.peak_overflow, overflow)
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        with metrics._lock:
+            metrics.connections_invalidated += 1
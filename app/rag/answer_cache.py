@@ -0,0 +1,102 @@
+"""
+Two-level cache of generated RAG answers.
+
+1. Exact: keyed by the normalized question text.
+2. Semantic: the question embedding is compared (cosine) against recently
+   answered questions; a match above RAG_ANSWER_SIMILARITY_THRESHOLD reuses
+   that answer.
+
+Both levels are LRU-bounded with a TTL, and everything is dropped as soon as
+a different index version is served.
+"""
+import os
+import re
+import threading
+from functools import lru_cache
+
+import numpy as np
+
+from app.rag import index_store
+from app.rag.embeddings import get_embeddings
+from app.utils.cache import TTLCache
+
+ANSWER_CACHE_SIZE = int(os.getenv("RAG_ANSWER_CACHE_SIZE", "512"))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("RAG_ANSWER_CACHE_TTL_SECONDS", "600"))
+# Cosine similarity needed to reuse another question's answer; 0 disables the semantic level
+SIMILARITY_THRESHOLD = float(os.getenv("RAG_ANSWER_SIMILARITY_THRESHOLD", "0.95"))
+
+_exact = TTLCache(maxsize=ANSWER_CACHE_SIZE, ttl=ANSWER_CACHE_TTL_SECONDS)
+_semantic = TTLCache(maxsize=ANSWER_CACHE_SIZE, ttl=ANSWER_CACHE_TTL_SECONDS)  # key -> (unit vector, answer)
+_version = None
+_lock = threading.Lock()
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(question: str) -> str:
+    """Case-, punctuation- and whitespace-insensitive form of a question."""
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", question.lower())).strip()
+
+
+@lru_cache(maxsize=256)
+def _embed(key: str) -> np.ndarray:
+    vector = np.asarray(get_embeddings().embed_query(key), dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _use_version(version):
+    """Drop every entry when the caller is serving a different index version."""
+    global _version
+    with _lock:
+        if version != _version:
+            _exact.clear()
+            _semantic.clear()
+            _version = version
+
+
+def lookup(question: str, version):
+    """Return a cached answer for `question` under index `version`, or None."""
+    key = normalize(question)
+    if not key:
+        return None
+    _use_version(version)
+
+    answer = _exact.get(key)
+    if answer is not None or SIMILARITY_THRESHOLD <= 0:
+        return answer
+
+    entries = _semantic.items()
+    if not entries:
+        return None
+    vectors = np.stack([vector for _, (vector, _) in entries])
+    scores = vectors @ _embed(key)
+    best = int(np.argmax(scores))
+    if scores[best] < SIMILARITY_THRESHOLD:
+        return None
+
+    answer = entries[best][1][1]
+    _exact.set(key, answer)
+    return answer
+
+
+def store(question: str, version, answer: str):
+    """Remember `answer` for `question`, if it was generated from the live `version`."""
+    key = normalize(question)
+    if not key or not answer or version != _version:
+        # Generated from an index that has since been replaced
+        return
+    _exact.set(key, answer)
+    if SIMILARITY_THRESHOLD > 0:
+        _semantic.set(key, (_embed(key), answer))
+
+
+def clear():
+    with _lock:
+        _exact.clear()
+        _semantic.clear()
+
+
+# A build promoted by this process invalidates immediately
+index_store.on_promote(lambda version: _use_version(version))
@@ -1,10 +1,76 @@
 # app/rag/auto_refresh.py
+import os
+import threading
+from datetime import datetime, timedelta
+
 from apscheduler.schedulers.background import BackgroundScheduler
-from app.rag.setup_rag import build_vectorstore
+from app.rag.setup_rag import sync_vectorstore
+
+# Periodic safety-net sync; routers also request a sync right after writes
+SYNC_INTERVAL_MINUTES = int(os.getenv("RAG_SYNC_INTERVAL_MINUTES", "60"))
+# Writes arriving within this window share one sync
+SYNC_DEBOUNCE_SECONDS = float(os.getenv("RAG_SYNC_DEBOUNCE_SECONDS", "5"))
+# Every sync copies the live index, so write-triggered syncs are spaced at
+# least this far apart...
+SYNC_MIN_INTERVAL_SECONDS = float(os.getenv("RAG_SYNC_MIN_INTERVAL_SECONDS", "120"))
+# ...unless this many writes are already waiting
+SYNC_MAX_PENDING_CHANGES = int(os.getenv("RAG_SYNC_MAX_PENDING_CHANGES", "50"))
+
+_SYNC_JOB_ID = "rag_sync_on_change"
+
+scheduler = BackgroundScheduler()
+
+_state_lock = threading.Lock()
+_pending_changes = 0
+_last_sync = None
+_scheduled_for = None
+
+
+def _sync_pending_changes():
+    """Sync everything written so far; later writes count towards the next sync."""
+    global _pending_changes, _last_sync, _scheduled_for
+    with _state_lock:
+        _pending_changes = 0
+        _last_sync = datetime.now()
+        _scheduled_for = None
+    sync_vectorstore()
+
 
 def start_auto_refresh():
-    """Runs vectorstore rebuild every hour in background."""
-    scheduler = BackgroundScheduler()
-    scheduler.add_job(build_vectorstore, "interval", hours=1)
+    """Runs the incremental vectorstore sync periodically in background."""
+    scheduler.add_job(
+        _sync_pending_changes, "interval", minutes=SYNC_INTERVAL_MINUTES,
+        max_instances=1, coalesce=True,
+    )
     scheduler.start()
-    print("⏰ Auto-refresh started (rebuilds every 1 hour).")
+    print(f"⏰ Auto-refresh started (incremental sync every {SYNC_INTERVAL_MINUTES} min).")
+
+
+def request_index_sync():
+    """
+    Ask for a near-real-time sync after an event/ticket write.
+
+    Calls within the debounce window collapse into a single pending job, so
+    a burst of edits costs one sync. After a sync, the next one waits for
+    SYNC_MIN_INTERVAL_SECONDS unless SYNC_MAX_PENDING_CHANGES writes pile up.
+    """
+    global _pending_changes, _scheduled_for
+    if not scheduler.running:
+        return
+    with _state_lock:
+        _pending_changes += 1
+        run_date = datetime.now() + timedelta(seconds=SYNC_DEBOUNCE_SECONDS)
+        if _last_sync is not None and _pending_changes < SYNC_MAX_PENDING_CHANGES:
+            run_date = max(run_date, _last_sync + timedelta(seconds=SYNC_MIN_INTERVAL_SECONDS))
+        if _scheduled_for is not None and _scheduled_for <= run_date:
+            return
+        # First request, or enough changes piled up to pull the sync forward
+        _scheduled_for = run_date
+        scheduler.add_job(
+            _sync_pending_changes,
+            "date",
+            run_date=run_date,
+            id=_SYNC_JOB_ID,
+            replace_existing=True,
+            max_instances=1,
+        )
@@ -0,0 +1,231 @@
+"""
+Embedding model shared by index builds and retrieval, with a persistent,
+content-addressed cache.
+
+RAG_EMBEDDING_BACKEND picks how the model runs: "torch" (sentence-transformers
+via HuggingFaceEmbeddings) or "onnx", an int8-quantized export of the same
+model served by onnxruntime (create it with `python -m app.rag.export_onnx`;
+needs onnxruntime and tokenizers). Vectors from the two backends are close
+but not identical, so rebuild the index after switching.
+
+Vectors live in one append-only float32 matrix per model (`<model>.f32`,
+memory-mapped for reads); a SQLite index maps sha256(model, chunk text) to
+its row. Rebuilds only call the model for chunk text it has never seen.
+"""
+import fcntl
+import hashlib
+import os
+import sqlite3
+import threading
+
+import numpy as np
+from langchain_community.embeddings import HuggingFaceEmbeddings
+from langchain_core.embeddings import Embeddings
+
+from app.rag.index_store import RAG_DB_DIR
+
+EMBEDDING_MODEL_NAME = os.getenv("RAG_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBEDDING_BACKEND = os.getenv("RAG_EMBEDDING_BACKEND", "torch").lower()
+ONNX_MODEL_DIR = os.getenv("RAG_ONNX_MODEL_DIR", os.path.join(RAG_DB_DIR, "onnx"))
+ONNX_MODEL_FILE = "model_int8.onnx"
+# sentence-transformers truncates all-MiniLM-L6-v2 inputs at 256 tokens
+ONNX_MAX_LENGTH = int(os.getenv("RAG_ONNX_MAX_LENGTH", "256"))
+ONNX_BATCH_SIZE = int(os.getenv("RAG_ONNX_BATCH_SIZE", "32"))
+EMBEDDING_CACHE_DIR = os.getenv(
+    "RAG_EMBEDDING_CACHE_DIR", os.path.join(RAG_DB_DIR, "embedding_cache")
+)
+
+# SQLite caps the number of bound parameters per statement
+_LOOKUP_BATCH = 500
+
+
+class EmbeddingCache:
+    """Append-only on-disk store of vectors keyed by content hash."""
+
+    def __init__(self, directory: str, model_name: str):
+        os.makedirs(directory, exist_ok=True)
+        slug = "".join(c if c.isalnum() or c in "-_." else "_" for c in model_name)
+        self.model_name = model_name
+        self.data_path = os.path.join(directory, f"{slug}.f32")
+        self.index_path = os.path.join(directory, f"{slug}.idx.sqlite")
+        self._lock = threading.Lock()
+        self._mmap = None
+        self._mmap_rows = 0
+
+        self._db = sqlite3.connect(self.index_path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, row INTEGER NOT NULL)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self._db.commit()
+        row = self._db.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+        self.dim = int(row[0]) if row else None
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def lookup(self, keys: list[str]) -> dict:
+        """Return {key: row} for the keys already cached."""
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), _LOOKUP_BATCH):
+                batch = keys[start:start + _LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                found.update(self._db.execute(
+                    f"SELECT key, row FROM entries WHERE key IN ({placeholders})", batch
+                ).fetchall())
+        return found
+
+    def read(self, rows: list[int]) -> np.ndarray:
+        with self._lock:
+            needed = max(rows) + 1 if rows else 0
+            if self._mmap is None or needed > self._mmap_rows:
+                total = os.path.getsize(self.data_path) // (self.dim * 4)
+                self._mmap = np.memmap(self.data_path, dtype=np.float32, mode="r", shape=(total, self.dim))
+                self._mmap_rows = total
+            return np.asarray(self._mmap[rows])
+
+    def append(self, keys: list[str], vectors: np.ndarray):
+        """Persist new vectors; the file lock keeps concurrent writers from interleaving rows."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self._lock, open(self.data_path, "ab") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                if self.dim is None:
+                    self.dim = vectors.shape[1]
+                    self._db.execute("INSERT OR REPLACE INTO meta VALUES ('dim', ?)", (str(self.dim),))
+
+                row_bytes = self.dim * 4
+                size = f.seek(0, os.SEEK_END)
+                if size % row_bytes:
+                    # A crash mid-append left a partial row; drop it
+                    size -= size % row_bytes
+                    f.truncate(size)
+                first_row = size // row_bytes
+
+                f.write(vectors.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO entries (key, row) VALUES (?, ?)",
+                    [(key, first_row + i) for i, key in enumerate(keys)],
+                )
+                self._db.commit()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class OnnxEmbeddings(Embeddings):
+    """Quantized ONNX export of a sentence-transformers model: mean pooling + L2 normalization."""
+
+    def __init__(self, model_dir: str = ONNX_MODEL_DIR, max_length: int = ONNX_MAX_LENGTH,
+                 batch_size: int = ONNX_BATCH_SIZE, threads: int = 0):
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise RuntimeError("The onnx embedding backend needs `onnxruntime` and `tokenizers` installed") from e
+
+        model_path = os.path.join(model_dir, ONNX_MODEL_FILE)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"❌ ONNX model not found at {model_path}. Run `python -m app.rag.export_onnx` first.")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = threads  # 0 = onnxruntime default (all cores)
+        self._session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self._session.get_inputs()}
+
+        self._tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self._tokenizer.enable_truncation(max_length=max_length)
+        self._tokenizer.enable_padding()
+        self.batch_size = max(batch_size, 1)
+
+    def _embed(self, texts: list[str]) -> np.ndarray:
+        encodings = self._tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feed = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feed["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        hidden = self._session.run(None, feed)[0]
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        vectors = [self._embed(texts[i:i + self.batch_size]) for i in range(0, len(texts), self.batch_size)]
+        return np.concatenate(vectors).tolist() if vectors else []
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed([text])[0].tolist()
+
+
+def embedding_model_id(model_name: str = EMBEDDING_MODEL_NAME, backend: str = EMBEDDING_BACKEND) -> str:
+    """Identity used to key cached vectors; differs per backend since their vectors differ."""
+    return model_name if backend == "torch" else f"{model_name}+{backend}-int8"
+
+
+def load_embedding_model(model_name: str = EMBEDDING_MODEL_NAME, backend: str = EMBEDDING_BACKEND,
+                         threads: int = 0) -> Embeddings:
+    if backend == "onnx":
+        return OnnxEmbeddings(threads=threads)
+    if backend != "torch":
+        raise ValueError(f"Unknown RAG_EMBEDDING_BACKEND {backend!r} (expected 'torch' or 'onnx')")
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+    return HuggingFaceEmbeddings(model_name=model_name)
+
+
+class CachedEmbeddings(Embeddings):
+    """Wraps an embedding model; document embeddings are served from the cache when possible."""
+
+    def __init__(self, model: Embeddings, cache: EmbeddingCache):
+        self.model = model
+        self.cache = cache
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys = [self.cache.key(t) for t in texts]
+        cached = self.cache.lookup(list(set(keys)))
+
+        # Embed each unseen text once, even if it repeats within the batch
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        if missing:
+            vectors = np.asarray(self.model.embed_documents(list(missing.values())), dtype=np.float32)
+            self.cache.append(list(missing), vectors)
+            cached.update(self.cache.lookup(list(missing)))
+
+        return self.cache.read([cached[k] for k in keys]).tolist() if keys else []
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.model.embed_query(text)
+
+
+_embeddings = None
+_cache = None
+_embeddings_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Process-wide cache for vectors of the configured model and backend."""
+    global _cache
+    if _cache is None:
+        with _embeddings_lock:
+            if _cache is None:
+                _cache = EmbeddingCache(EMBEDDING_CACHE_DIR, embedding_model_id())
+    return _cache
+
+
+def get_embeddings() -> CachedEmbeddings:
+    """Process-wide embedding model; loaded once and kept resident."""
+    global _embeddings
+    if _embeddings is None:
+        cache = get_embedding_cache()
+        with _embeddings_lock:
+            if _embeddings is None:
+                _embeddings = CachedEmbeddings(load_embedding_model(), cache)
+    return _embeddings
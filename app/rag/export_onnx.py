@@ -0,0 +1,57 @@
+"""
+Export the sentence-transformers embedding model to ONNX and quantize its
+weights to int8 for the "onnx" embedding backend.
+
+    python -m app.rag.export_onnx
+
+Needs torch, transformers and onnxruntime at export time only; serving
+needs onnxruntime and tokenizers.
+"""
+import argparse
+import os
+
+from app.rag.embeddings import EMBEDDING_MODEL_NAME, ONNX_MODEL_DIR, ONNX_MODEL_FILE
+
+_INPUTS = ["input_ids", "attention_mask", "token_type_ids"]
+
+
+def export_onnx(model_name: str = EMBEDDING_MODEL_NAME, output_dir: str = ONNX_MODEL_DIR) -> str:
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModel, AutoTokenizer
+
+    # HuggingFaceEmbeddings resolves bare names under sentence-transformers/
+    hub_name = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+    tokenizer = AutoTokenizer.from_pretrained(hub_name)
+    model = AutoModel.from_pretrained(hub_name).eval()
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer.save_pretrained(output_dir)  # tokenizer.json for the `tokenizers` runtime
+
+    sample = tokenizer(["An event at the main hall"], return_tensors="pt")
+    fp32_path = os.path.join(output_dir, "model_fp32.onnx")
+    axes = {0: "batch", 1: "sequence"}
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in _INPUTS),
+            fp32_path,
+            input_names=_INPUTS,
+            output_names=["last_hidden_state"],
+            dynamic_axes={name: axes for name in _INPUTS + ["last_hidden_state"]},
+            opset_version=14,
+        )
+
+    int8_path = os.path.join(output_dir, ONNX_MODEL_FILE)
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    os.remove(fp32_path)
+    print(f"✅ Exported {hub_name} (int8) to {int8_path}")
+    return int8_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the embedding model to quantized ONNX.")
+    parser.add_argument("--model", default=EMBEDDING_MODEL_NAME)
+    parser.add_argument("--output-dir", default=ONNX_MODEL_DIR)
+    args = parser.parse_args()
+    export_onnx(args.model, args.output_dir)
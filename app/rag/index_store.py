@@ -0,0 +1,140 @@
+"""
+Versioned on-disk layout for the vector index.
+
+    rag_db/
+        CURRENT              name of the live version
+        versions/<version>/  one complete Chroma store per build
+
+Builds write into a fresh version directory and are promoted by atomically
+replacing CURRENT, so readers only ever open a complete store. Older
+versions are garbage-collected after each promotion.
+"""
+import fcntl
+import os
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+RAG_DB_DIR = os.path.join(os.path.dirname(__file__), "rag_db")
+VERSIONS_DIR = os.path.join(RAG_DB_DIR, "versions")
+CURRENT_FILE = os.path.join(RAG_DB_DIR, "CURRENT")
+LOCK_FILE = os.path.join(RAG_DB_DIR, ".build.lock")
+
+# Versions kept on disk, the live one included; the previous one stays
+# around so sessions still reading it are not pulled from under them
+KEEP_VERSIONS = max(int(os.getenv("RAG_KEEP_VERSIONS", "2")), 1)
+
+_listeners = []
+_listeners_lock = threading.Lock()
+_build_lock = threading.Lock()
+
+
+@contextmanager
+def build_lock():
+    """Serialize builds across threads and across worker processes."""
+    with _build_lock:
+        os.makedirs(RAG_DB_DIR, exist_ok=True)
+        with open(LOCK_FILE, "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def current_version():
+    """Name of the live version, or None before the first versioned build."""
+    try:
+        with open(CURRENT_FILE) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def version_dir(version: str) -> str:
+    return os.path.join(VERSIONS_DIR, version)
+
+
+def current_index_dir() -> str:
+    """Directory of the live store; falls back to the legacy unversioned one."""
+    version = current_version()
+    return version_dir(version) if version else RAG_DB_DIR
+
+
+def new_version(copy_from=None):
+    """Create an empty (or copied) directory for the next build. Returns (version, path)."""
+    version = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:8]
+    path = version_dir(version)
+    os.makedirs(VERSIONS_DIR, exist_ok=True)
+    if copy_from:
+        shutil.copytree(version_dir(copy_from), path)
+    else:
+        os.makedirs(path)
+    return version, path
+
+
+def release_store(path: str):
+    """
+    Stop and forget the Chroma system cached for a store directory. Chroma
+    keeps one per path for the life of the process, so without this every
+    version ever opened would stay in memory.
+    """
+    try:
+        from chromadb.api.shared_system_client import SharedSystemClient
+    except ImportError:
+        try:
+            from chromadb.api.client import SharedSystemClient
+        except ImportError:
+            return
+    system = SharedSystemClient._identifier_to_system.pop(path, None)
+    if system is not None:
+        try:
+            system.stop()
+        except Exception as e:
+            print(f"⚠️ Could not stop Chroma system for {path}: {e}")
+
+
+def discard(version: str):
+    """Remove a build that failed, was never promoted or was retired."""
+    path = version_dir(version)
+    release_store(path)
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def promote(version: str):
+    """Atomically make `version` the live index, then collect old versions."""
+    tmp_path = CURRENT_FILE + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, CURRENT_FILE)
+    print(f"🚀 Vector DB version {version} is live.")
+
+    gc_versions()
+
+    with _listeners_lock:
+        listeners = list(_listeners)
+    for listener in listeners:
+        try:
+            listener(version)
+        except Exception as e:
+            print(f"⚠️ Index promotion listener failed: {e}")
+
+
+def gc_versions():
+    """Delete all but the newest KEEP_VERSIONS versions, never the live one."""
+    live = current_version()
+    if not os.path.isdir(VERSIONS_DIR):
+        return
+    others = sorted((v for v in os.listdir(VERSIONS_DIR) if v != live), reverse=True)
+    for version in others[KEEP_VERSIONS - 1:]:
+        discard(version)
+
+
+def on_promote(listener):
+    """Register `listener(version)` to run after each promotion in this process."""
+    with _listeners_lock:
+        _listeners.append(listener)
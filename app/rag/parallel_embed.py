@@ -0,0 +1,84 @@
+"""
+Multi-process embedding for full index rebuilds.
+
+Chunks are cut into shards of RAG_EMBED_WORKER_BATCH_SIZE and spread over
+RAG_EMBED_WORKERS processes. Each process loads its own copy of the model
+once. Shards come back in submission order, so the merged vectors line up
+with the input texts exactly as a single-process run would.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import get_context
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.rag.embeddings import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_MODEL_NAME,
+    CachedEmbeddings,
+    get_embedding_cache,
+    load_embedding_model,
+)
+
+# 0 or 1 keeps embedding in-process
+EMBED_WORKERS = int(os.getenv("RAG_EMBED_WORKERS", "0"))
+WORKER_BATCH_SIZE = int(os.getenv("RAG_EMBED_WORKER_BATCH_SIZE", "32"))
+
+_worker_model = None
+
+
+def _init_worker(model_name: str, backend: str, threads: int):
+    global _worker_model
+    # Workers split the cores; unbounded intra-op threads would oversubscribe them
+    _worker_model = load_embedding_model(model_name, backend, threads=threads)
+
+
+def _embed_shard(texts: list[str]) -> np.ndarray:
+    return np.asarray(_worker_model.embed_documents(texts), dtype=np.float32)
+
+
+class ParallelEmbeddings(Embeddings):
+    """Embeddings backed by a pool of model-holding worker processes."""
+
+    def __init__(self, workers: int = EMBED_WORKERS, model_name: str = EMBEDDING_MODEL_NAME,
+                 batch_size: int = WORKER_BATCH_SIZE, backend: str = EMBEDDING_BACKEND):
+        self.workers = max(workers, 1)
+        self.batch_size = max(batch_size, 1)
+        threads = max((os.cpu_count() or 1) // self.workers, 1)
+        # spawn: the parent runs pipeline threads, which fork() would not carry over safely
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_name, backend, threads),
+        )
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        shards = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        # map() yields in submission order: the merge is deterministic
+        return np.concatenate(list(self._pool.map(_embed_shard, shards))).tolist()
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+    def close(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+
+@contextmanager
+def parallel_embeddings(workers: int = EMBED_WORKERS, batch_size: int = WORKER_BATCH_SIZE):
+    """
+    Cached embeddings whose misses are computed by `workers` processes.
+
+    Yields (embeddings, pipeline batch size): batches sized to give every
+    worker a full shard.
+    """
+    model = ParallelEmbeddings(workers=workers, batch_size=batch_size)
+    try:
+        yield CachedEmbeddings(model, get_embedding_cache()), model.workers * model.batch_size
+    finally:
+        model.close()
@@ -0,0 +1,94 @@
+"""
+Minimal staged pipeline: each stage runs in its own thread and hands items
+to the next one through a bounded queue, so a fast producer waits for a slow
+consumer instead of buffering everything in memory.
+
+    run_pipeline(read_rows(), chunk, embed, write)
+
+The source is any iterable. Every stage is a callable taking an iterator of
+inputs and returning an iterator of outputs, so it can batch or filter
+freely. The last stage runs on the calling thread. The first error in any
+stage stops the others and is re-raised.
+"""
+import os
+import queue
+import threading
+
+PIPELINE_QUEUE_SIZE = int(os.getenv("RAG_PIPELINE_QUEUE_SIZE", "4"))
+
+_END = object()
+_POLL_SECONDS = 0.1
+
+
+def run_pipeline(source, *stages, maxsize: int = PIPELINE_QUEUE_SIZE) -> list:
+    """Run `source` through `stages`; returns the outputs of the last stage."""
+    if not stages:
+        return list(source)
+
+    stop = threading.Event()
+    errors = []
+
+    def put(q, item) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def drain(q):
+        while True:
+            try:
+                item = q.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                if stop.is_set():
+                    return
+                continue
+            if item is _END:
+                return
+            yield item
+
+    def feed(items, q):
+        try:
+            for item in items:
+                if not put(q, item):
+                    return
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+            return
+        finally:
+            # Release the source's resources (e.g. a DB cursor) on early exit
+            close = getattr(items, "close", None)
+            if close is not None:
+                close()
+        put(q, _END)
+
+    threads = []
+    upstream = source
+    for stage in stages[:-1]:
+        q = queue.Queue(maxsize=maxsize)
+        threads.append(threading.Thread(target=feed, args=(upstream, q), daemon=True))
+        upstream = stage(drain(q))
+    # The iterator feeding the last stage is produced by the previous thread
+    q = queue.Queue(maxsize=maxsize)
+    threads.append(threading.Thread(target=feed, args=(upstream, q), daemon=True))
+
+    for thread in threads:
+        thread.start()
+    try:
+        results = list(stages[-1](drain(q)))
+    except BaseException as e:
+        errors.append(e)
+        stop.set()
+        raise
+    finally:
+        if errors:
+            stop.set()
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        raise errors[0]
+    return results
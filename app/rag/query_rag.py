@@ -1,4 +1,6 @@
 import os
+import threading
+import time
 from dotenv import load_dotenv
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_community.vectorstores import Chroma
@@ -6,9 +8,33 @@ from langchain.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
 from langsmith import Client
+from sqlalchemy import select
+
+from app.database import SessionLocal
+from app.models import Ticket
+from app.rag import answer_cache, index_store
+from app.rag.embeddings import get_embeddings
+from app.rag.retrieval import StructuredRetriever, load_venues
 
 load_dotenv()
 
+# How often get_rag_chain() re-reads CURRENT to notice builds promoted by
+# other processes; promotions in this process swap the chain immediately
+INDEX_POLL_SECONDS = float(os.getenv("RAG_INDEX_POLL_SECONDS", "5"))
+
+# --- Process-wide RAG runtime --- #
+# The LLM client and prompt are created once per process; the vectorstore,
+# retriever and chain are rebuilt only when a new index version goes live
+# and are swapped in with a single reference assignment.
+_llm = None
+_prompt = None
+_chain_state = None  # (index version, chain)
+# Version served before the current one; kept open for in-flight queries
+_previous_version = None
+_last_poll = 0.0
+_init_lock = threading.Lock()
+_swap_lock = threading.Lock()
+
 
 def get_prompt():
     """Fetch prompt from LangSmith or fallback to default."""
@@ -29,37 +55,155 @@ def get_prompt():
         """)
 
 
-def get_rag_chain():
-    """Initialize and return the RAG pipeline."""
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
-        temperature=0.6,
-        convert_system_message_to_human=True,
-        streaming=True  # 👈 important for WebSocket
-    )
+def _get_llm():
+    global _llm
+    if _llm is None:
+        with _init_lock:
+            if _llm is None:
+                _llm = ChatGoogleGenerativeAI(
+                    model="gemini-2.5-flash",
+                    temperature=0.6,
+                    convert_system_message_to_human=True,
+                    streaming=True  # 👈 important for WebSocket
+                )
+    return _llm
+
+
+def _get_prompt():
+    global _prompt
+    if _prompt is None:
+        with _init_lock:
+            if _prompt is None:
+                _prompt = get_prompt()
+    return _prompt
+
 
-    persist_directory = os.path.join(os.path.dirname(__file__), "rag_db")
+def set_llm(llm):
+    """Swap the chat model (e.g. a fake one for benchmarks); chains are rebuilt."""
+    global _llm, _chain_state
+    with _swap_lock:
+        _llm = llm
+        _chain_state = None
+
+
+def reset_rag_runtime():
+    """Drop every cached component so the next call initializes from scratch."""
+    global _llm, _prompt, _chain_state
+    with _swap_lock:
+        _llm = None
+        _prompt = None
+        _chain_state = None
+
+
+def _availability(docs) -> dict:
+    """Current stock per event for the retrieved documents: {event_id: [line, ...]}."""
+    event_ids = {doc.metadata["event_id"] for doc in docs if "event_id" in doc.metadata}
+    if not event_ids:
+        return {}
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            select(Ticket.event_id, Ticket.type, Ticket.quantity)
+            .where(Ticket.event_id.in_(event_ids))
+            .order_by(Ticket.price, Ticket.id)
+        ).all()
+    finally:
+        db.close()
+    lines = {}
+    for event_id, ticket_type, quantity in rows:
+        lines.setdefault(event_id, []).append(f"        - {ticket_type}: {quantity} available")
+    return lines
+
+
+def _build_chain(persist_directory: str):
     if not os.path.exists(persist_directory):
         raise FileNotFoundError("❌ Vector store not found. Run setup_rag.py first.")
 
-    vectorstore = Chroma(persist_directory=persist_directory)
-    retriever = vectorstore.as_retriever()
-
-    prompt = get_prompt()
+    vectorstore = Chroma(persist_directory=persist_directory, embedding_function=get_embeddings())
+    # Filters on dates/venue/price found in the question before similarity search
+    retriever = StructuredRetriever.from_vectorstore(vectorstore, venues=load_venues(persist_directory))
 
     def format_docs(docs):
-        return "\n\n".join(doc.page_content for doc in docs)
+        # Stock is not indexed (it changes with every booking); add it live
+        stock = _availability(docs)
+        parts = []
+        for doc in docs:
+            # Once per event, even when several of its chunks were retrieved
+            lines = stock.pop(doc.metadata.get("event_id"), None)
+            if lines:
+                parts.append(doc.page_content.rstrip() + "\n        Availability:\n" + "\n".join(lines))
+            else:
+                parts.append(doc.page_content)
+        return "\n\n".join(parts)
 
-    rag_chain = (
+    return (
         {"context": retriever | format_docs, "question": RunnablePassthrough()}
-        | prompt
-        | llm
+        | _get_prompt()
+        | _get_llm()
         | StrOutputParser()
     )
-    return rag_chain
+
+
+def _live_version():
+    global _last_poll
+    state = _chain_state
+    now = time.monotonic()
+    if state is not None and now - _last_poll < INDEX_POLL_SECONDS:
+        return state[0]
+    _last_poll = now
+    return index_store.current_version()
+
+
+def get_live_chain():
+    """Return (index version, shared RAG pipeline) for the live index version."""
+    version = _live_version()
+    state = _chain_state
+    if state is not None and state[0] == version:
+        return state
+    return version, _swap_chain(version)
+
+
+def get_rag_chain():
+    """Return the shared RAG pipeline for the live index version."""
+    return get_live_chain()[1]
+
+
+def _version_path(version):
+    return index_store.version_dir(version) if version else index_store.RAG_DB_DIR
+
+
+def _swap_chain(version):
+    global _chain_state, _previous_version
+    with _swap_lock:
+        state = _chain_state
+        if state is not None and state[0] == version:
+            return state[1]
+        chain = _build_chain(_version_path(version))
+        _chain_state = (version, chain)
+        if state is not None and state[0] != version:
+            # Queries started two swaps back have long finished
+            if _previous_version is not None and _previous_version != version:
+                index_store.release_store(_version_path(_previous_version))
+            _previous_version = state[0]
+        print(f"🔁 RAG chain now serving index version {version or 'legacy'}.")
+        return chain
+
+
+def _on_promote(version):
+    # Swap immediately when this process promotes a new build
+    if _chain_state is not None:
+        _swap_chain(version)
+
+
+index_store.on_promote(_on_promote)
 
 
 def query_rag(question: str):
     """Run a single RAG query and return result."""
-    rag_chain = get_rag_chain()
-    return rag_chain.invoke(question)
+    version, rag_chain = get_live_chain()
+    cached = answer_cache.lookup(question, version)
+    if cached is not None:
+        return cached
+    answer = rag_chain.invoke(question)
+    answer_cache.store(question, version, answer)
+    return answer
@@ -0,0 +1,302 @@
+"""
+Structured retrieval over the event index.
+
+Every indexed chunk carries its event's metadata (event_id, date_ts, venue,
+min/max ticket price). Dates, venues and price limits mentioned in the
+question are turned into a Chroma `where` filter, so similarity search only
+scans matching events. With RAG_HYBRID_BM25=true, a keyword (BM25) ranking
+over the same filtered events is fused with the vector ranking using
+reciprocal rank fusion.
+"""
+import calendar
+import json
+import math
+import os
+import re
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+RETRIEVER_K = int(os.getenv("RAG_RETRIEVER_K", "4"))
+HYBRID_BM25 = os.getenv("RAG_HYBRID_BM25", "false").lower() == "true"
+# Standard RRF damping constant
+RRF_K = 60
+# Venue keys of an index version, written next to it at build time
+VENUES_FILE = "index_venues.json"
+
+_MONTHS = {name.lower(): n for n, name in enumerate(calendar.month_name) if name}
+_MONTHS.update({name.lower(): n for n, name in enumerate(calendar.month_abbr) if name})
+_MONTH_NAMES = "|".join(sorted(_MONTHS, key=len, reverse=True))
+# "in march", "during dec 2026", "march 2026"; a bare "may" is usually a verb
+_MONTH_RE = re.compile(
+    r"\b(?:in|during|for|throughout)\s+(" + _MONTH_NAMES + r")\b(?:\s+(\d{4}))?"
+    r"|\b(" + _MONTH_NAMES + r")\s+(\d{4})\b"
+)
+_ISO_DATE_RE = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+_CURRENCY = r"(rs\.?|inr|usd|₹|\$)"
+_UNIT = r"(rupees|dollars|bucks|rs|inr|usd)\b"
+# Three groups per amount: currency before, number, unit after
+_AMOUNT = _CURRENCY + r"?\s*(\d+(?:\.\d+)?)(?:\s*" + _UNIT + r")?"
+_BETWEEN_RE = re.compile(r"\bbetween\s+" + _AMOUNT + r"\s+(?:and|-|to)\s+" + _AMOUNT)
+_MAX_PRICE_RE = re.compile(r"\b(?:under|below|less than|cheaper than|at most|up to|max(?:imum)?)\s+" + _AMOUNT)
+_MIN_PRICE_RE = re.compile(r"\b(?:over|above|more than|at least|min(?:imum)?)\s+" + _AMOUNT)
+# A bare number is only a price with a currency or one of these words nearby;
+# "up to 6 tickets" or "over 18 year olds" are not price limits
+_PRICE_WORD_RE = re.compile(r"\b(?:price[sd]?|pricing|costs?|costing|cheap(?:er|est)?|fees?|budget|spend)\b")
+PRICE_CONTEXT_CHARS = 30
+_TOKEN_RE = re.compile(r"\w+")
+
+
+# --- Metadata filters --- #
+def _day(dt: datetime) -> datetime:
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _month_range(year: int, month: int):
+    start = datetime(year, month, 1, tzinfo=timezone.utc)
+    end = datetime(year + (month == 12), month % 12 + 1, 1, tzinfo=timezone.utc)
+    return start, end
+
+
+def _date_range(question: str, now: datetime):
+    """(start, end) of the period the question asks about, or None."""
+    today = _day(now)
+    if "today" in question or "tonight" in question:
+        return today, today + timedelta(days=1)
+    if "tomorrow" in question:
+        return today + timedelta(days=1), today + timedelta(days=2)
+    if "this weekend" in question or "the weekend" in question:
+        if today.weekday() == 6:
+            return today, today + timedelta(days=1)
+        saturday = today + timedelta(days=5 - today.weekday())
+        return saturday, saturday + timedelta(days=2)
+    if "next week" in question:
+        monday = today + timedelta(days=7 - today.weekday())
+        return monday, monday + timedelta(days=7)
+    if "this week" in question:
+        return today, today + timedelta(days=7 - today.weekday())
+    if "next month" in question:
+        return _month_range(now.year + (now.month == 12), now.month % 12 + 1)
+    if "this month" in question:
+        return today, _month_range(now.year, now.month)[1]
+
+    match = _ISO_DATE_RE.search(question)
+    if match:
+        try:
+            day = datetime(*map(int, match.groups()), tzinfo=timezone.utc)
+            return day, day + timedelta(days=1)
+        except ValueError:
+            pass
+
+    match = _MONTH_RE.search(question)
+    if match:
+        name, year = (match.group(1), match.group(2)) if match.group(1) else (match.group(3), match.group(4))
+        month = _MONTHS[name]
+        year = int(year) if year else now.year + (month < now.month)
+        return _month_range(year, month)
+
+    if "upcoming" in question or "coming up" in question:
+        return now, None
+    return None
+
+
+def _amount(match, group: int) -> float:
+    return float(match.group(group + 1))
+
+
+def _price_match(pattern, question: str):
+    """First match of `pattern` that is marked as money, or None."""
+    for match in pattern.finditer(question):
+        groups = match.groups()
+        # Currency and unit groups of every amount in the match
+        if any(groups[i] or groups[i + 2] for i in range(0, len(groups), 3)):
+            return match
+        if _PRICE_WORD_RE.search(question, max(match.start() - PRICE_CONTEXT_CHARS, 0), match.end()):
+            return match
+    return None
+
+
+def parse_filters(question: str, venues=(), now: Optional[datetime] = None) -> dict:
+    """
+    Extract structured constraints from a question.
+
+    Returns a dict with any of: date_from / date_to (epoch seconds),
+    venue (lower-cased, one of `venues`), max_price, min_price.
+    """
+    question = question.lower()
+    now = now or datetime.now(timezone.utc)
+    filters = {}
+
+    period = _date_range(question, now)
+    if period:
+        filters["date_from"] = int(period[0].timestamp())
+        if period[1] is not None:
+            filters["date_to"] = int(period[1].timestamp())
+
+    # Longest known venue mentioned in the question
+    for venue in sorted(venues, key=len, reverse=True):
+        if venue and re.search(r"\b" + re.escape(venue) + r"\b", question):
+            filters["venue"] = venue
+            break
+
+    match = _price_match(_BETWEEN_RE, question)
+    if match:
+        low, high = sorted((_amount(match, 1), _amount(match, 4)))
+        filters["min_price"], filters["max_price"] = low, high
+    else:
+        match = _price_match(_MAX_PRICE_RE, question)
+        if match:
+            filters["max_price"] = _amount(match, 1)
+        match = _price_match(_MIN_PRICE_RE, question)
+        if match:
+            filters["min_price"] = _amount(match, 1)
+    return filters
+
+
+def to_where(filters: dict):
+    """Translate parse_filters() output into a Chroma `where` clause."""
+    conditions = []
+    if "date_from" in filters:
+        conditions.append({"date_ts": {"$gte": filters["date_from"]}})
+    if "date_to" in filters:
+        conditions.append({"date_ts": {"$lt": filters["date_to"]}})
+    if "venue" in filters:
+        conditions.append({"venue_key": {"$eq": filters["venue"]}})
+    # An event matches a price limit if at least one of its tickets does
+    if "max_price" in filters:
+        conditions.append({"min_price": {"$lte": filters["max_price"]}})
+    if "min_price" in filters:
+        conditions.append({"max_price": {"$gte": filters["min_price"]}})
+
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+
+def matches(metadata: dict, filters: dict) -> bool:
+    """In-memory equivalent of to_where(), used for the keyword ranking."""
+    date_ts = metadata.get("date_ts")
+    if "date_from" in filters and (date_ts is None or date_ts < filters["date_from"]):
+        return False
+    if "date_to" in filters and (date_ts is None or date_ts >= filters["date_to"]):
+        return False
+    if "venue" in filters and metadata.get("venue_key") != filters["venue"]:
+        return False
+    if "max_price" in filters and not metadata.get("min_price", math.inf) <= filters["max_price"]:
+        return False
+    if "min_price" in filters and not metadata.get("max_price", -math.inf) >= filters["min_price"]:
+        return False
+    return True
+
+
+def save_venues(venues, persist_directory: str):
+    """Write the venue keys of a build next to its vectors."""
+    path = os.path.join(persist_directory, VENUES_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(sorted(venues), f)
+    os.replace(tmp_path, path)
+
+
+def load_venues(persist_directory: str):
+    """Venue keys saved with a build, or None for older builds."""
+    try:
+        with open(os.path.join(persist_directory, VENUES_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+# --- Keyword ranking --- #
+def _tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class BM25Index:
+    """Okapi BM25 over the indexed chunks, kept in memory next to the vector store."""
+
+    def __init__(self, documents: list[Document], k1: float = 1.5, b: float = 0.75):
+        self.documents = documents
+        self.k1, self.b = k1, b
+        self._terms = [Counter(_tokenize(doc.page_content)) for doc in documents]
+        self._lengths = [sum(terms.values()) for terms in self._terms]
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if documents else 0.0
+        doc_freq = Counter(term for terms in self._terms for term in terms)
+        n = len(documents)
+        self._idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()}
+
+    def search(self, query: str, k: int, filters: dict) -> list[Document]:
+        query_terms = [t for t in _tokenize(query) if t in self._idf]
+        if not query_terms:
+            return []
+        scored = []
+        for i, doc in enumerate(self.documents):
+            if not matches(doc.metadata, filters):
+                continue
+            terms, length = self._terms[i], self._lengths[i]
+            score = 0.0
+            for term in query_terms:
+                tf = terms.get(term)
+                if tf:
+                    norm = self.k1 * (1 - self.b + self.b * length / (self._avg_length or 1))
+                    score += self._idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            if score > 0:
+                scored.append((score, i))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [self.documents[i] for _, i in scored[:k]]
+
+
+def _doc_key(doc: Document):
+    return doc.metadata.get("doc_id"), doc.page_content
+
+
+def reciprocal_rank_fusion(rankings: list[list[Document]], k: int) -> list[Document]:
+    scores, docs = {}, {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking):
+            key = _doc_key(doc)
+            docs.setdefault(key, doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (RRF_K + rank + 1)
+    ordered = sorted(scores, key=lambda key: -scores[key])
+    return [docs[key] for key in ordered[:k]]
+
+
+# --- Retriever --- #
+class StructuredRetriever(BaseRetriever):
+    """Metadata-filtered vector search, optionally fused with BM25."""
+
+    vectorstore: Any
+    k: int = RETRIEVER_K
+    venues: list = []
+    bm25: Optional[Any] = None
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore, k: int = RETRIEVER_K, hybrid: bool = HYBRID_BM25, venues=None):
+        """
+        `venues` comes from the version's VENUES_FILE when available; the
+        collection is only read in full for the BM25 index.
+        """
+        bm25 = None
+        if hybrid:
+            stored = vectorstore.get(include=["documents", "metadatas"])
+            metadatas = stored.get("metadatas") or []
+            bm25 = BM25Index([
+                Document(page_content=text, metadata=metadata or {})
+                for text, metadata in zip(stored.get("documents") or [], metadatas)
+            ])
+        elif venues is None:
+            # Index built before venue lists were saved
+            metadatas = vectorstore.get(include=["metadatas"]).get("metadatas") or []
+        if venues is None:
+            venues = {m["venue_key"] for m in metadatas if m and m.get("venue_key")}
+        return cls(vectorstore=vectorstore, k=k, venues=sorted(venues), bm25=bm25)
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> list[Document]:
+        filters = parse_filters(query, self.venues)
+        docs = self.vectorstore.similarity_search(query, k=self.k, filter=to_where(filters))
+        if self.bm25 is None:
+            return docs
+        return reciprocal_rank_fusion([docs, self.bm25.search(query, self.k, filters)], self.k)
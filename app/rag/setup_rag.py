@@ -1,3 +1,5 @@
+import hashlib
+import json
 import os
 import sys
 from dotenv import load_dotenv
@@ -6,80 +8,320 @@ from dotenv import load_dotenv
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import Chroma
-from sqlalchemy.orm import Session
+from datetime import timezone
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
 from app.database import SessionLocal
-from app.models import Event, Ticket
+from app.models import Event
+from app.rag import index_store
+from app.rag.embeddings import get_embeddings
+from app.rag.parallel_embed import EMBED_WORKERS, parallel_embeddings
+from app.rag.pipeline import run_pipeline
+from app.rag.retrieval import save_venues
 
 load_dotenv()  # Loads GOOGLE_API_KEY from .env
 
+# doc_id -> {"hash": content hash, "chunks": number of chunks indexed}
+MANIFEST_FILE = "index_manifest.json"
+CHUNK_SIZE = int(os.getenv("RAG_CHUNK_SIZE", "2000"))
+# Events fetched per DB round trip while streaming
+READ_BATCH_SIZE = int(os.getenv("RAG_READ_BATCH_SIZE", "500"))
+# Chunks embedded and written per batch
+EMBED_BATCH_SIZE = int(os.getenv("RAG_EMBED_BATCH_SIZE", "64"))
 
-def get_text_from_db():
-    """Fetch data from Event and Ticket tables and combine into text docs."""
-    db: Session = SessionLocal()
-    events = db.query(Event).all()
-    tickets = db.query(Ticket).all()
-    db.close()
-
-    docs = []
-
-    # Create text chunks from events
-    for e in events:
-        text = f"""
-        Event Title: {e.title}
-        Description: {e.description or 'No description available.'}
-        Date: {e.date}
-        Venue: {e.venue or 'Not specified'}
-        Organizer ID: {e.organizer_id}
-        """
-        docs.append(text)
-
-    # Create text chunks from tickets
-    for t in tickets:
-        text = f"""
-        Ticket Type: {t.type}
-        Price: {t.price}
-        Quantity: {t.quantity}
-        Event ID: {t.event_id}
+
+def event_document(event: Event):
+    """
+    One self-contained document per event, tickets included, plus the
+    metadata retrieval filters on (see app/rag/retrieval.py). Stock counts
+    are left out so bookings do not change the content hash; query_rag
+    looks them up when it answers.
+    """
+    tickets = sorted(event.tickets, key=lambda t: (t.price, t.id))
+    ticket_lines = "\n".join(
+        f"        - {t.type}: price {t.price}" for t in tickets
+    ) or "        - No tickets listed yet."
+    text = f"""
+        Event ID: {event.id}
+        Event Title: {event.title}
+        Description: {event.description or 'No description available.'}
+        Date: {event.date}
+        Venue: {event.venue or 'Not specified'}
+        Organizer ID: {event.organizer_id}
+        Tickets:
+{ticket_lines}
         """
-        docs.append(text)
 
-    return docs
+    metadata = {"event_id": event.id}
+    if event.date is not None:
+        date = event.date if event.date.tzinfo else event.date.replace(tzinfo=timezone.utc)
+        metadata["date_ts"] = int(date.timestamp())
+    if event.venue:
+        metadata["venue"] = event.venue
+        metadata["venue_key"] = event.venue.strip().lower()
+    if tickets:
+        # Chroma metadata cannot hold None; events without tickets simply lack prices
+        metadata["min_price"] = float(tickets[0].price)
+        metadata["max_price"] = float(tickets[-1].price)
+    return text, metadata
 
 
-def build_vectorstore():
-    """Create embeddings and save them in ChromaDB."""
-    print("📦 Fetching data from database...")
-    raw_docs = get_text_from_db()
-
-    # Split text into manageable chunks
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=250,
-        chunk_overlap=50,
+def iter_event_documents(batch_size: int = READ_BATCH_SIZE):
+    """
+    Stream (doc_id, (text, metadata)) for every event, reading `batch_size`
+    events at a time (server-side cursor on PostgreSQL). Tickets are loaded
+    per batch and each batch is released once its documents are built.
+    """
+    db: Session = SessionLocal()
+    try:
+        statement = (
+            select(Event)
+            .options(selectinload(Event.tickets))
+            .order_by(Event.id)
+            .execution_options(yield_per=batch_size)
+        )
+        for partition in db.execute(statement).scalars().partitions():
+            for event in partition:
+                yield f"event:{event.id}", event_document(event)
+            db.expunge_all()
+    finally:
+        db.close()
+
+
+def get_text_from_db():
+    """
+    Fetch events with their tickets and build one document per event.
+
+    Returns {doc_id: (text, metadata)}; ids are stable ("event:<id>") so an
+    event keeps the same vectors across syncs. Index builds stream through
+    iter_event_documents() instead of materializing this dict.
+    """
+    return dict(iter_event_documents())
+
+
+def content_hash(doc) -> str:
+    text, metadata = doc
+    payload = text + json.dumps(metadata, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _splitter():
+    # Sized so an event with its tickets stays a single chunk; only very long
+    # descriptions are split, and every piece keeps the event's metadata
+    return RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=100,
         length_function=len
     )
-    docs = splitter.create_documents(raw_docs)
-    print(f"📄 Split into {len(docs)} chunks for embedding.")
 
-    # Initialize embeddings (Gemini)
-    
-    embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
 
-    # Create Chroma vector store
-    persist_directory = os.path.join(os.path.dirname(__file__), "rag_db")
+def _chunk_ids(doc_id: str, count: int) -> list[str]:
+    return [f"{doc_id}#{n}" for n in range(count)]
+
+
+def load_manifest(persist_directory: str) -> dict:
+    try:
+        with open(os.path.join(persist_directory, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_manifest(manifest: dict, persist_directory: str):
+    """Write the manifest atomically so a crash never leaves it half-written."""
+    path = os.path.join(persist_directory, MANIFEST_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+
+def _open_vectorstore(persist_directory: str):
+    # Resident model + on-disk cache: unchanged chunk text is never re-embedded
+    embeddings = get_embeddings()
     os.makedirs(persist_directory, exist_ok=True)
+    return Chroma(persist_directory=persist_directory, embedding_function=embeddings)
 
-    vectorstore = Chroma.from_documents(
-        documents=docs,
-        embedding=embeddings,
-        persist_directory=persist_directory
-    )
 
-    vectorstore.persist()
-    print(f"✅ Vector DB built successfully at: {persist_directory}")
+class _VersionTarget:
+    """Vector store of the version being built; created on first write."""
+
+    def __init__(self, copy_from=None):
+        self.copy_from = copy_from
+        self.version = None
+        self.path = None
+        self._vectorstore = None
 
+    def open(self):
+        if self._vectorstore is None:
+            self.version, self.path = index_store.new_version(copy_from=self.copy_from)
+            self._vectorstore = _open_vectorstore(self.path)
+        return self._vectorstore
 
+    def discard(self):
+        if self.version is not None:
+            index_store.discard(self.version)
 
 
+def _index_stream(documents, target: _VersionTarget, manifest: dict, previous=None, seen=None,
+                  venues=None, embeddings=None, batch_size: int = EMBED_BATCH_SIZE):
+    """
+    Split, embed and upsert a stream of documents, recording their hashes in
+    `manifest`. Reading, chunking, embedding and writing run as concurrent
+    stages (see app/rag/pipeline.py). Documents whose hash matches `previous`
+    are skipped; ids of every document read are added to `seen` and their
+    venue keys to `venues`.
+
+    Returns (documents indexed, chunks indexed).
+    """
+    previous = previous or {}
+    seen = seen if seen is not None else set()
+    venues = venues if venues is not None else set()
+    splitter = _splitter()
+    embeddings = embeddings or get_embeddings()
+    doc_count = 0
+
+    def chunk(docs):
+        nonlocal doc_count
+        batch = {"ids": [], "texts": [], "metadatas": [], "delete_ids": []}
+        for doc_id, doc in docs:
+            seen.add(doc_id)
+            if doc[1].get("venue_key"):
+                venues.add(doc[1]["venue_key"])
+            digest = content_hash(doc)
+            old = previous.get(doc_id)
+            if old is not None and old["hash"] == digest:
+                continue
+
+            text, metadata = doc
+            chunks = splitter.split_text(text)
+            batch["texts"].extend(chunks)
+            batch["metadatas"].extend({"doc_id": doc_id, **metadata} for _ in chunks)
+            batch["ids"].extend(_chunk_ids(doc_id, len(chunks)))
+            if old is not None and old["chunks"] > len(chunks):
+                # Same ids are overwritten; only surplus chunks need deleting
+                batch["delete_ids"].extend(_chunk_ids(doc_id, old["chunks"])[len(chunks):])
+            manifest[doc_id] = {"hash": digest, "chunks": len(chunks)}
+            doc_count += 1
+
+            if len(batch["ids"]) >= batch_size:
+                yield batch
+                batch = {"ids": [], "texts": [], "metadatas": [], "delete_ids": []}
+        if batch["ids"] or batch["delete_ids"]:
+            yield batch
+
+    def embed(batches):
+        for batch in batches:
+            batch["embeddings"] = embeddings.embed_documents(batch["texts"]) if batch["texts"] else []
+            yield batch
+
+    def write(batches):
+        for batch in batches:
+            collection = target.open()._collection
+            if batch["delete_ids"]:
+                collection.delete(ids=batch["delete_ids"])
+            if batch["ids"]:
+                collection.upsert(
+                    ids=batch["ids"],
+                    embeddings=batch["embeddings"],
+                    metadatas=batch["metadatas"],
+                    documents=batch["texts"],
+                )
+            yield len(batch["ids"])
+
+    chunk_count = sum(run_pipeline(documents, chunk, embed, write))
+    return doc_count, chunk_count
+
+
+def validate_vectorstore(vectorstore, expected_chunks: int):
+    """Refuse to promote a store that is missing chunks or cannot be queried."""
+    count = vectorstore._collection.count()
+    if count != expected_chunks:
+        raise RuntimeError(f"Vector DB has {count} chunks, expected {expected_chunks}")
+    if expected_chunks and not vectorstore.similarity_search("event", k=1):
+        raise RuntimeError("Vector DB returned no results for a probe query")
+
+
+def sync_vectorstore():
+    """
+    Bring the vector store up to date with the database incrementally.
+
+    Only documents that were added, changed (different content hash) or
+    deleted since the last sync are re-embedded or removed. The changes are
+    applied to a copy of the live version, which is promoted once validated;
+    no copy is made when nothing changed.
+    """
+    with index_store.build_lock():
+        live = index_store.current_version()
+        if live is None:
+            # No versioned index yet (or a legacy one without stable ids)
+            _rebuild()
+            return
+
+        previous = load_manifest(index_store.version_dir(live))
+        manifest = dict(previous)
+        target = _VersionTarget(copy_from=live)
+        seen, venues = set(), set()
+        try:
+            doc_count, chunk_count = _index_stream(
+                iter_event_documents(), target, manifest, previous=previous, seen=seen, venues=venues
+            )
+            removed = [doc_id for doc_id in previous if doc_id not in seen]
+            if not doc_count and not removed:
+                print("✅ Vector DB already up to date.")
+                return
+
+            vectorstore = target.open()
+            stale_ids = []
+            for doc_id in removed:
+                stale_ids.extend(_chunk_ids(doc_id, manifest.pop(doc_id)["chunks"]))
+            if stale_ids:
+                vectorstore.delete(ids=stale_ids)
+
+            validate_vectorstore(vectorstore, sum(m["chunks"] for m in manifest.values()))
+            save_manifest(manifest, target.path)
+            save_venues(venues, target.path)
+        except Exception:
+            target.discard()
+            raise
+
+        index_store.promote(target.version)
+        print(
+            f"🔄 Vector DB synced: {doc_count} docs re-embedded ({chunk_count} chunks), "
+            f"{len(removed)} removed."
+        )
+
+
+def _rebuild():
+    print("📦 Streaming data from database...")
+    target = _VersionTarget()
+    try:
+        vectorstore = target.open()
+        manifest, venues = {}, set()
+        if EMBED_WORKERS > 1:
+            print(f"🧵 Embedding with {EMBED_WORKERS} worker processes.")
+            with parallel_embeddings(EMBED_WORKERS) as (embeddings, batch_size):
+                doc_count, chunk_count = _index_stream(
+                    iter_event_documents(), target, manifest, venues=venues,
+                    embeddings=embeddings, batch_size=batch_size,
+                )
+        else:
+            doc_count, chunk_count = _index_stream(iter_event_documents(), target, manifest, venues=venues)
+        print(f"📄 Indexed {doc_count} docs as {chunk_count} chunks.")
+        validate_vectorstore(vectorstore, chunk_count)
+        save_manifest(manifest, target.path)
+        save_venues(venues, target.path)
+    except Exception:
+        target.discard()
+        raise
+
+    index_store.promote(target.version)
+    print(f"✅ Vector DB built successfully at: {target.path}")
+
+
+def build_vectorstore():
+    """Create embeddings for every document into a new version and promote it."""
+    with index_store.build_lock():
+        _rebuild()
@@ -0,0 +1,64 @@
+import asyncio
+import os
+
+# A frame is flushed once it holds this many characters...
+FRAME_MAX_CHARS = int(os.getenv("RAG_FRAME_MAX_CHARS", "64"))
+# ...or once its oldest token has waited this long
+FRAME_MAX_DELAY_SECONDS = float(os.getenv("RAG_FRAME_MAX_DELAY_MS", "50")) / 1000
+
+
+async def coalesce_tokens(tokens, max_chars: int = FRAME_MAX_CHARS, max_delay: float = FRAME_MAX_DELAY_SECONDS):
+    """
+    Regroup an async stream of tokens into larger frames.
+
+    A frame is yielded when it reaches `max_chars`, when `max_delay` has
+    passed since its first token (even if the model is still thinking), or
+    when the stream ends.
+    """
+    iterator = tokens.__aiter__()
+    loop = asyncio.get_running_loop()
+    buffer, size, deadline = [], 0, None
+    pending = None
+
+    async def next_token():
+        return await iterator.__anext__()
+
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(next_token())
+            timeout = None if deadline is None else max(deadline - loop.time(), 0)
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+
+            if not done:
+                # Model is slow; ship what we have rather than hold it back
+                yield "".join(buffer)
+                buffer, size, deadline = [], 0, None
+                continue
+
+            task, pending = pending, None
+            try:
+                token = task.result()
+            except StopAsyncIteration:
+                break
+            if not token:
+                continue
+
+            buffer.append(token)
+            size += len(token)
+            if deadline is None:
+                deadline = loop.time() + max_delay
+            if size >= max_chars:
+                yield "".join(buffer)
+                buffer, size, deadline = [], 0, None
+
+        if buffer:
+            yield "".join(buffer)
+    finally:
+        if pending is not None:
+            pending.cancel()
+            # Let the cancellation land before closing the source generator
+            await asyncio.gather(pending, return_exceptions=True)
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
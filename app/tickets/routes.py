@@ -1,21 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 from app.database import get_db
 from app.models import Ticket, Event, User
 from app.tickets.schemas import TicketCreate, TicketResponse
 from app.auth.dependencies import  get_current_user
+from app.bookings import hot_inventory
+from app.rag.auto_refresh import request_index_sync
+from app.pagination import PageParams, keyset_paginate
 
 router = APIRouter(prefix="/tickets", tags=["Tickets"])
 
 
 # --- CREATE TICKET (Organizer only) --- #
 @router.post("/", response_model=TicketResponse)
-def create_ticket(
+async def create_ticket(
     ticket: TicketCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    event = db.query(Event).filter(Event.id == ticket.event_id).first()
+    event = await db.get(Event, ticket.event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
 
@@ -24,78 +31,93 @@ def create_ticket(
 
     new_ticket = Ticket(**ticket.dict())
     db.add(new_ticket)
-    db.commit()
-    db.refresh(new_ticket)
+    await db.commit()
+    await db.refresh(new_ticket)
+    request_index_sync()
     return new_ticket
 
 
 # --- LIST ALL TICKETS FOR A GIVEN EVENT (accessible by anyone logged in) --- #
 @router.get("/by-event/{event_id}", response_model=list[TicketResponse])
-def get_tickets_for_event(
+async def get_tickets_for_event(
     event_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    event = db.query(Event).filter(Event.id == event_id).first()
+    event = await db.get(Event, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
 
-    tickets = db.query(Ticket).filter(Ticket.event_id == event_id).all()
+    tickets = (await db.scalars(select(Ticket).where(Ticket.event_id == event_id))).all()
     return tickets
 
 
 # --- LIST ALL TICKETS CREATED BY THE ORGANIZER --- #
 @router.get("/my", response_model=list[TicketResponse])
-def get_my_tickets(
-    db: Session = Depends(get_db),
+async def get_my_tickets(
+    response: Response,
+    page: PageParams = Depends(),
+    event_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """Organizer can view all tickets they have created for their events."""
-    # get all events created by this organizer
-    event_ids = [e.id for e in db.query(Event.id).filter(Event.organizer_id == current_user.id)]
-    tickets = db.query(Ticket).filter(Ticket.event_id.in_(event_ids)).all()
-    return tickets
+    statement = (
+        select(Ticket)
+        .join(Event, Ticket.event_id == Event.id)
+        .where(Event.organizer_id == current_user.id)
+    )
+    if event_id is not None:
+        statement = statement.where(Ticket.event_id == event_id)
+    return await keyset_paginate(db, statement, Ticket.id, page, response)
 
 
 # --- UPDATE TICKET (Organizer only) --- #
 @router.put("/{ticket_id}", response_model=TicketResponse)
-def update_ticket(
+async def update_ticket(
     ticket_id: int,
     ticket_data: TicketCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
+    ticket = await db.get(Ticket, ticket_id)
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
 
-    event = db.query(Event).filter(Event.id == ticket.event_id).first()
+    event = await db.get(Event, ticket.event_id)
     if event.organizer_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to update this ticket")
 
     for key, value in ticket_data.dict().items():
         setattr(ticket, key, value)
 
-    db.commit()
-    db.refresh(ticket)
+    await db.commit()
+    await db.refresh(ticket)
+    request_index_sync()
+
+    # Reseed the flash-sale counter from the edited row
+    if hot_inventory.is_hot(ticket.id):
+        await run_in_threadpool(hot_inventory.refresh_counter, ticket.id)
+
     return ticket
 
 
 # --- DELETE TICKET (Organizer only) --- #
 @router.delete("/{ticket_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_ticket(
+async def delete_ticket(
     ticket_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
+    ticket = await db.get(Ticket, ticket_id)
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
 
-    event = db.query(Event).filter(Event.id == ticket.event_id).first()
+    event = await db.get(Event, ticket.event_id)
     if event.organizer_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to delete this ticket")
 
-    db.delete(ticket)
-    db.commit()
+    await db.delete(ticket)
+    await db.commit()
+    request_index_sync()
     return {"message": "Ticket deleted successfully"}
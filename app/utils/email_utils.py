@@ -1,17 +1,63 @@
 from app.celery_worker import celery_app
 from celery import shared_task
+from celery.signals import worker_process_shutdown
 import os
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from dotenv import load_dotenv
 
+from app.utils.smtp_pool import close_smtp_pool, get_smtp_pool
+
 load_dotenv()
 
 GMAIL_USER = os.getenv("GMAIL_USER")
 GMAIL_PASSWORD = os.getenv("GMAIL_PASSWORD")
 
 
+@worker_process_shutdown.connect
+def _close_smtp_sessions(**kwargs):
+    close_smtp_pool()
+
+
+def build_message(to_email: str, subject: str, body: str):
+    msg = MIMEMultipart()
+    msg["From"] = GMAIL_USER
+    msg["To"] = to_email
+    msg["Subject"] = subject
+    msg.attach(MIMEText(body, "plain"))
+    return msg
+
+
+def deliver_batch(messages: list[dict], pool=None) -> dict:
+    """
+    Send {to, subject, body} messages over one pooled SMTP session.
+
+    A refused recipient does not stop the batch; a dropped session is
+    replaced and the batch continues on the new one.
+    """
+    sent, failed = 0, []
+    with (pool or get_smtp_pool()).session() as session:
+        for message in messages:
+            try:
+                session.send(build_message(message["to"], message["subject"], message["body"]))
+                sent += 1
+            except Exception as e:
+                if session.conn is None:
+                    # Could not even reconnect; the rest of the batch would fail too
+                    raise
+                print(f"⚠️ Failed to send email to {message['to']}: {e}")
+                failed.append(message["to"])
+    return {"sent": sent, "failed": failed}
+
+
+@shared_task
+def send_email_batch(messages: list[dict]):
+    """Deliver many messages over a single SMTP login; messages are {to, subject, body}."""
+    try:
+        return deliver_batch(messages)
+    except Exception as e:
+        return f"Failed to send email batch: {e}"
+
 
 @shared_task
 def send_booking_email(to_email: str, event_title: str, quantity: int, total_price: float):
@@ -26,23 +72,38 @@ def send_booking_email(to_email: str, event_title: str, quantity: int, total_pri
     Thank you for booking with us!
     """
 
-    msg = MIMEMultipart()
-    msg["From"] = GMAIL_USER
-    msg["To"] = to_email
-    msg["Subject"] = subject
-    msg.attach(MIMEText(body, "plain"))
-
     try:
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-            server.login(GMAIL_USER, GMAIL_PASSWORD)
-            server.send_message(msg)
+        get_smtp_pool().send(build_message(to_email, subject, body))
         return "Email sent successfully!"
     except Exception as e:
         return f"Failed to send email: {e}"
     
 
 @shared_task
-def send_event_reminder_email(to_email: str, event_title: str, event_time: str, venue: str):
+def send_bulk_booking_email(to_email: str, event_title: str, items: list, total_price: float):
+    """One confirmation for a multi-tier booking; items are {type, quantity, total_price}."""
+    subject = f"Booking Confirmation for {event_title}"
+    lines = "\n".join(
+        f"    - {item['type']}: {item['quantity']} ticket(s), ₹{item['total_price']}" for item in items
+    )
+    body = f"""
+    Hi there,
+
+    Your booking for '{event_title}' has been confirmed.
+{lines}
+    Total Price: ₹{total_price}
+
+    Thank you for booking with us!
+    """
+
+    try:
+        get_smtp_pool().send(build_message(to_email, subject, body))
+        return "Email sent successfully!"
+    except Exception as e:
+        return f"Failed to send email: {e}"
+
+
+def _reminder_content(event_title: str, event_time: str, venue: str):
     subject = f"Reminder: {event_title} starts soon!"
     body = f"""
     Hi there,
@@ -53,17 +114,25 @@ def send_event_reminder_email(to_email: str, event_title: str, event_time: str,
 
     See you there!
     """
+    return subject, body
 
-    msg = MIMEMultipart()
-    msg["From"] = GMAIL_USER
-    msg["To"] = to_email
-    msg["Subject"] = subject
-    msg.attach(MIMEText(body, "plain"))
+
+@shared_task
+def send_event_reminder_batch(to_emails: list, event_title: str, event_time: str, venue: str):
+    """One page of an event's reminder fan-out, delivered over a single SMTP session."""
+    subject, body = _reminder_content(event_title, event_time, venue)
+    try:
+        return deliver_batch([{"to": to, "subject": subject, "body": body} for to in to_emails])
+    except Exception as e:
+        return f"Failed to send reminder batch: {e}"
+
+
+@shared_task
+def send_event_reminder_email(to_email: str, event_title: str, event_time: str, venue: str):
+    subject, body = _reminder_content(event_title, event_time, venue)
 
     try:
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-            server.login(GMAIL_USER, GMAIL_PASSWORD)
-            server.send_message(msg)
+        get_smtp_pool().send(build_message(to_email, subject, body))
         return "Reminder email sent successfully!"
     except Exception as e:
         return f"Failed to send reminder email: {e}"
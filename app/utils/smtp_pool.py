@@ -0,0 +1,187 @@
+"""
+Per-process pool of authenticated SMTP sessions.
+
+Opening SMTP_SSL and logging in costs a TCP + TLS handshake and an AUTH round
+trip, which dominated every email task. Connections are now kept open and
+reused. Before reuse, a connection idle for more than
+SMTP_HEALTHCHECK_SECONDS is probed with NOOP. Broken connections are
+replaced transparently, and sessions are recycled after
+SMTP_MAX_MESSAGES_PER_CONNECTION messages (providers cap messages per
+session).
+"""
+import os
+import queue
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "465"))
+SMTP_USE_SSL = os.getenv("SMTP_USE_SSL", "true").lower() == "true"
+SMTP_USER = os.getenv("SMTP_USER", os.getenv("GMAIL_USER"))
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", os.getenv("GMAIL_PASSWORD"))
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "2"))
+SMTP_TIMEOUT_SECONDS = float(os.getenv("SMTP_TIMEOUT_SECONDS", "30"))
+SMTP_HEALTHCHECK_SECONDS = float(os.getenv("SMTP_HEALTHCHECK_SECONDS", "30"))
+SMTP_MAX_MESSAGES_PER_CONNECTION = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", "100"))
+
+
+def _is_connection_error(e: Exception) -> bool:
+    """True if the session itself can no longer be trusted (vs. e.g. a refused recipient)."""
+    if isinstance(e, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    # SMTPException subclasses OSError; plain OSErrors are socket/TLS failures
+    return isinstance(e, OSError) and not isinstance(e, smtplib.SMTPException)
+
+
+class _Connection:
+    def __init__(self, server):
+        self.server = server
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPConnectionPool:
+    """Bounded set of logged-in SMTP sessions, shared by the threads of one process."""
+
+    def __init__(self, host: str = SMTP_HOST, port: int = SMTP_PORT, use_ssl: bool = SMTP_USE_SSL,
+                 user=SMTP_USER, password=SMTP_PASSWORD, size: int = SMTP_POOL_SIZE,
+                 timeout: float = SMTP_TIMEOUT_SECONDS, healthcheck_seconds: float = SMTP_HEALTHCHECK_SECONDS,
+                 max_messages: int = SMTP_MAX_MESSAGES_PER_CONNECTION):
+        self.host, self.port, self.use_ssl = host, port, use_ssl
+        self.user, self.password = user, password
+        self.timeout = timeout
+        self.healthcheck_seconds = healthcheck_seconds
+        self.max_messages = max_messages
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max(size, 1))
+
+    def _connect(self) -> _Connection:
+        factory = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
+        server = factory(self.host, self.port, timeout=self.timeout)
+        if self.user:
+            server.login(self.user, self.password)
+        return _Connection(server)
+
+    @staticmethod
+    def _close(conn: _Connection):
+        try:
+            conn.server.quit()
+        except Exception:
+            try:
+                conn.server.close()
+            except Exception:
+                pass
+
+    def _healthy(self, conn: _Connection) -> bool:
+        if conn.sent >= self.max_messages:
+            return False
+        if time.monotonic() - conn.last_used < self.healthcheck_seconds:
+            return True
+        try:
+            return conn.server.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _acquire(self) -> _Connection:
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._connect()
+                if self._healthy(conn):
+                    return conn
+                self._close(conn)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, conn, broken: bool):
+        if conn is not None:
+            if broken:
+                self._close(conn)
+            else:
+                conn.last_used = time.monotonic()
+                self._idle.put(conn)
+        self._slots.release()
+
+    @contextmanager
+    def session(self):
+        """Hold one pooled session, e.g. to deliver a batch over a single login."""
+        session = _Session(self, self._acquire())
+        broken = False
+        try:
+            yield session
+        except Exception as e:
+            broken = _is_connection_error(e)
+            raise
+        finally:
+            self._release(session.conn, broken)
+
+    def send(self, msg):
+        """Send one message on a pooled session; reconnects once if the session dropped."""
+        with self.session() as session:
+            session.send(msg)
+
+    def close(self):
+        """Close every idle session (worker shutdown)."""
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+class _Session:
+    """A checked-out connection that replaces itself after a disconnect."""
+
+    def __init__(self, pool: SMTPConnectionPool, conn: _Connection):
+        self.pool = pool
+        self.conn = conn
+
+    def _reconnect(self):
+        old, self.conn = self.conn, None
+        self.pool._close(old)
+        self.conn = self.pool._connect()
+
+    def send(self, msg):
+        if self.conn.sent >= self.pool.max_messages:
+            self._reconnect()
+        try:
+            self.conn.server.send_message(msg)
+        except Exception as e:
+            if not _is_connection_error(e):
+                raise
+            # Stale session (server timeout, network blip): retry once on a new one
+            self._reconnect()
+            self.conn.server.send_message(msg)
+        self.conn.sent += 1
+        self.conn.last_used = time.monotonic()
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_smtp_pool() -> SMTPConnectionPool:
+    """The current process's pool; a forked worker never reuses its parent's sockets."""
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = SMTPConnectionPool()
+                _pool_pid = os.getpid()
+    return _pool
+
+
+def close_smtp_pool():
+    if _pool is not None and _pool_pid == os.getpid():
+        _pool.close()
@@ -0,0 +1,141 @@
+"""
+Concurrency stress test for booking one ticket row.
+
+    python -m benchmarks.booking_concurrency --bookings 500 --stock 300
+
+Fires --bookings concurrent inventory.book_tickets() calls (1 to
+--max-quantity tickets each) at a single fresh Ticket row holding --stock
+tickets, through the same sessions the API uses (DB_MODE decides async or
+threaded). --concurrency caps the calls in flight; it defaults to the
+connection pool capacity so calls contend on the row, not on the pool.
+Afterwards it checks that the stock never went below zero, that the booked
+quantities add up to exactly the stock taken, and that no more was sold
+than existed. Exits non-zero if any check fails.
+
+Runs against DATABASE_URL at migration head; the rows it creates are
+deleted at the end.
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException
+from sqlalchemy import delete, func, select
+
+from app.bookings import inventory
+from app.database import DB_MAX_OVERFLOW, DB_POOL_SIZE, SessionLocal, get_db
+from app.db_migrations import run_migrations
+from app.models import Booking, Event, Ticket, User
+
+session = asynccontextmanager(get_db)
+
+
+def create_fixture(stock: int) -> tuple[int, int, int]:
+    """A throwaway user, event and ticket row; returns their ids."""
+    tag = uuid.uuid4().hex[:8]
+    db = SessionLocal()
+    try:
+        user = User(username=f"stress-{tag}", email=f"stress-{tag}@example.com", password="x")
+        db.add(user)
+        db.flush()
+        event = Event(title=f"Stress test {tag}", organizer_id=user.id)
+        db.add(event)
+        db.flush()
+        ticket = Ticket(type="General", price=10.0, quantity=stock, event_id=event.id)
+        db.add(ticket)
+        db.commit()
+        return user.id, event.id, ticket.id
+    finally:
+        db.close()
+
+
+def drop_fixture(user_id: int, event_id: int, ticket_id: int):
+    db = SessionLocal()
+    try:
+        db.execute(delete(Booking).where(Booking.ticket_id == ticket_id))
+        db.execute(delete(Ticket).where(Ticket.id == ticket_id))
+        db.execute(delete(Event).where(Event.id == event_id))
+        db.execute(delete(User).where(User.id == user_id))
+        db.commit()
+    finally:
+        db.close()
+
+
+async def book(user_id: int, ticket_id: int, quantity: int, outcomes: dict, limit: asyncio.Semaphore):
+    async with limit, session() as db:
+        try:
+            await inventory.book_tickets(db, user_id, ticket_id, quantity)
+            outcomes["booked"] += 1
+            outcomes["quantity"] += quantity
+        except HTTPException as e:
+            outcomes["sold_out" if e.status_code == 400 else "failed"] += 1
+        except Exception as e:
+            outcomes["failed"] += 1
+            outcomes.setdefault("errors", set()).add(type(e).__name__)
+
+
+async def stress(args, user_id: int, ticket_id: int) -> dict:
+    rnd = random.Random(args.seed)
+    outcomes = {"booked": 0, "quantity": 0, "sold_out": 0, "failed": 0}
+    limit = asyncio.Semaphore(args.concurrency)
+    calls = [
+        book(user_id, ticket_id, rnd.randint(1, args.max_quantity), outcomes, limit)
+        for _ in range(args.bookings)
+    ]
+    started = time.perf_counter()
+    await asyncio.gather(*calls)
+    outcomes["seconds"] = time.perf_counter() - started
+    return outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bookings", type=int, default=500)
+    parser.add_argument("--stock", type=int, default=300)
+    parser.add_argument("--max-quantity", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    run_migrations("head")
+    user_id, event_id, ticket_id = create_fixture(args.stock)
+    try:
+        outcomes = asyncio.run(stress(args, user_id, ticket_id))
+
+        db = SessionLocal()
+        try:
+            final_stock = db.scalar(select(Ticket.quantity).where(Ticket.id == ticket_id))
+            booked_rows, booked_quantity = db.execute(
+                select(func.count(Booking.id), func.coalesce(func.sum(Booking.quantity), 0))
+                .where(Booking.ticket_id == ticket_id)
+            ).one()
+        finally:
+            db.close()
+    finally:
+        drop_fixture(user_id, event_id, ticket_id)
+
+    print(f"{args.bookings} concurrent bookings in {outcomes['seconds']:.2f}s: "
+          f"{outcomes['booked']} booked, {outcomes['sold_out']} sold out, {outcomes['failed']} failed "
+          f"{sorted(outcomes.get('errors', []))}")
+    print(f"stock {args.stock} -> {final_stock}, {booked_rows} booking rows for {booked_quantity} tickets")
+
+    checks = [
+        ("final stock is not negative", final_stock >= 0),
+        ("booked tickets do not exceed the initial stock", booked_quantity <= args.stock),
+        ("booked tickets equal the stock taken", booked_quantity == args.stock - final_stock),
+        ("every successful call has its booking row",
+         booked_rows == outcomes["booked"] and booked_quantity == outcomes["quantity"]),
+    ]
+    ok = True
+    for name, passed in checks:
+        print(f"{'✅' if passed else '❌'} {name}")
+        ok = ok and passed
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
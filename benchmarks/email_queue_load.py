@@ -0,0 +1,138 @@
+"""
+Load test: booking-confirmation latency during a reminder storm, with one
+shared queue versus the dedicated confirmations/reminders queues.
+
+    python -m benchmarks.email_queue_load --storm-batches 200 --batch-size 200 --probes 50
+
+Needs a running broker (BROKER_URL) and the `celery` CLI. The script starts
+a local SMTP stand-in and its own workers pointed at it, so no real email is
+sent. For each topology it queues the storm of reminder batches, then sends
+confirmation probes at a steady rate. Latency is measured from enqueue to the
+stand-in accepting the message.
+
+- shared:    everything on one queue served by one worker pool (the old setup)
+- dedicated: confirmations on their own queue and workers (app/celery_worker.py)
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from app.celery_worker import CONFIRMATIONS_QUEUE, REMINDERS_QUEUE, celery_app
+from benchmarks.smtp_throughput import StandInSMTPServer
+
+CONFIRMATION_TASK = "app.utils.email_utils.send_booking_email"
+REMINDER_BATCH_TASK = "app.utils.email_utils.send_event_reminder_batch"
+PROBE_PREFIX = "probe-"
+
+
+def _start_worker(name: str, queues: str, concurrency: int, smtp_port: int):
+    env = dict(
+        os.environ,
+        SMTP_HOST="127.0.0.1",
+        SMTP_PORT=str(smtp_port),
+        SMTP_USE_SSL="false",
+        SMTP_USER="",
+        SMTP_HEALTHCHECK_SECONDS="3600",
+    )
+    return subprocess.Popen(
+        [sys.executable, "-m", "celery", "-A", "app.celery_worker", "worker",
+         "-Q", queues, "-c", str(concurrency), "-n", f"{name}@%h", "--loglevel=WARNING"],
+        env=env,
+    )
+
+
+def _wait_for_workers(count: int, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        replies = celery_app.control.ping(timeout=1) or []
+        if len(replies) >= count:
+            return
+    raise RuntimeError("Celery workers did not come up; is the broker running?")
+
+
+def run_topology(name: str, args, server: StandInSMTPServer, arrivals: dict):
+    port = server.server_address[1]
+    celery_app.control.purge()
+
+    if name == "shared":
+        workers = [_start_worker("shared", REMINDERS_QUEUE, args.concurrency * 2, port)]
+        confirmation_queue = REMINDERS_QUEUE
+    else:
+        workers = [
+            _start_worker("confirmations", CONFIRMATIONS_QUEUE, args.concurrency, port),
+            _start_worker("reminders", REMINDERS_QUEUE, args.concurrency, port),
+        ]
+        confirmation_queue = CONFIRMATIONS_QUEUE
+
+    try:
+        _wait_for_workers(len(workers))
+        arrivals.clear()
+
+        for b in range(args.storm_batches):
+            emails = [f"attendee{b}-{i}@example.com" for i in range(args.batch_size)]
+            celery_app.send_task(REMINDER_BATCH_TASK, args=[emails, "Storm Event", "2026-10-18 18:00 UTC", "Main Hall"])
+
+        sent_at = {}
+        for p in range(args.probes):
+            title = f"{PROBE_PREFIX}{name}-{p}"
+            sent_at[title] = time.monotonic()
+            celery_app.send_task(
+                CONFIRMATION_TASK, args=[f"buyer{p}@example.com", title, 1, 100.0], queue=confirmation_queue
+            )
+            time.sleep(args.probe_interval)
+
+        deadline = time.monotonic() + args.timeout
+        while time.monotonic() < deadline and not all(t in arrivals for t in sent_at):
+            time.sleep(0.05)
+
+        latencies = sorted((arrivals[t] - sent_at[t]) * 1000 for t in sent_at if t in arrivals)
+        missing = len(sent_at) - len(latencies)
+        if latencies:
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            print(f"{name:<10} confirmations p50={statistics.median(latencies):9.1f} ms  "
+                  f"p95={p95:9.1f} ms  max={latencies[-1]:9.1f} ms  missing={missing}")
+        else:
+            print(f"{name:<10} no confirmation arrived within {args.timeout}s")
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.wait()
+        celery_app.control.purge()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--storm-batches", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--probes", type=int, default=50)
+    parser.add_argument("--probe-interval", type=float, default=0.1)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--handshake-ms", type=float, default=40)
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    arrivals = {}
+    lock = threading.Lock()
+
+    def on_message(subject):
+        if subject and PROBE_PREFIX in subject:
+            title = subject.split("Booking Confirmation for ", 1)[-1]
+            with lock:
+                arrivals.setdefault(title, time.monotonic())
+
+    server = StandInSMTPServer(args.handshake_ms / 1000, on_message=on_message)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        for topology in ("shared", "dedicated"):
+            run_topology(topology, args, server, arrivals)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Parity and speed of the int8 ONNX embedding backend against the torch one.
+
+    python -m app.rag.export_onnx          # once
+    python -m benchmarks.embedding_backends --chunks 2000 --queries 200
+
+Parity: cosine similarity between the two backends' vectors for the same
+chunk/query text. The run exits non-zero if the minimum falls below
+--min-cosine. Speed: model load time, bulk chunks/second and single-query
+p50/p95 latency for each backend.
+"""
+import argparse
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from app.rag.embeddings import EMBEDDING_MODEL_NAME, load_embedding_model
+from benchmarks.embedding_throughput import synthetic_chunks
+
+QUERIES = [
+    "When is the next concert at the Grand Hall?",
+    "VIP ticket price for the food festival",
+    "Any workshops this weekend under 30?",
+    "What comedy nights are coming up?",
+]
+
+
+def _unit(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def measure(backend: str, chunks: list[str], queries: list[str]):
+    start = time.perf_counter()
+    model = load_embedding_model(EMBEDDING_MODEL_NAME, backend)
+    load_seconds = time.perf_counter() - start
+
+    model.embed_documents(chunks[:32])  # warm-up
+    start = time.perf_counter()
+    doc_vectors = model.embed_documents(chunks)
+    bulk_rate = len(chunks) / (time.perf_counter() - start)
+
+    query_vectors, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        query_vectors.append(model.embed_query(query))
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+    print(f"{backend:<6} load={load_seconds:6.2f} s  bulk={bulk_rate:8.1f} chunks/s  "
+          f"query p50={statistics.median(latencies):6.2f} ms  p95={p95:6.2f} ms")
+    return _unit(doc_vectors), _unit(query_vectors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    args = parser.parse_args()
+
+    chunks = synthetic_chunks(args.chunks)
+    queries = [QUERIES[i % len(QUERIES)] + f" #{i}" for i in range(args.queries)]
+
+    torch_docs, torch_queries = measure("torch", chunks, queries)
+    onnx_docs, onnx_queries = measure("onnx", chunks, queries)
+
+    cosines = np.concatenate([(torch_docs * onnx_docs).sum(axis=1), (torch_queries * onnx_queries).sum(axis=1)])
+    print(f"parity cosine: min={cosines.min():.4f} mean={cosines.mean():.4f} (threshold {args.min_cosine})")
+
+    # Retrieval-level parity: does each query pick the same top chunk?
+    same_top = np.mean((torch_queries @ torch_docs.T).argmax(axis=1) == (onnx_queries @ onnx_docs.T).argmax(axis=1))
+    print(f"top-1 retrieval agreement: {same_top:.1%}")
+
+    if cosines.min() < args.min_cosine:
+        print("❌ ONNX backend is not within the parity threshold.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Embedding throughput (chunks/second) versus worker-process count, for
+sizing the machine that runs full index rebuilds.
+
+    python -m benchmarks.embedding_throughput --chunks 5000 --workers 1 2 4 8
+
+Synthetic event documents are embedded directly by the model (the embedding
+cache is bypassed). Model loading is excluded from the timings. Each
+parallel run is also checked against the single-process vectors, since the
+merge must line up exactly with the input order.
+"""
+import argparse
+import os
+import random
+import time
+
+import numpy as np
+from langchain_community.embeddings import HuggingFaceEmbeddings
+
+from app.rag.embeddings import EMBEDDING_MODEL_NAME
+from app.rag.parallel_embed import WORKER_BATCH_SIZE, ParallelEmbeddings
+
+VENUES = ["Grand Hall", "Riverside Arena", "City Theatre", "Open Air Stage"]
+KINDS = ["Concert", "Workshop", "Conference", "Comedy Night", "Food Festival"]
+
+
+def synthetic_chunks(count: int) -> list[str]:
+    rnd = random.Random(7)
+    chunks = []
+    for i in range(count):
+        kind = rnd.choice(KINDS)
+        chunks.append(
+            f"Event ID: {i}\nEvent Title: {kind} #{i}\n"
+            f"Description: A {kind.lower()} with guests from around the region.\n"
+            f"Venue: {rnd.choice(VENUES)}\n"
+            f"Tickets:\n- General: price {rnd.randint(10, 60)}\n- VIP: price {rnd.randint(80, 300)}"
+        )
+    return chunks
+
+
+def run_single(chunks: list[str], batch_size: int):
+    model = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
+    model.embed_documents(chunks[:batch_size])  # warm-up
+    start = time.perf_counter()
+    vectors = []
+    for i in range(0, len(chunks), batch_size):
+        vectors.extend(model.embed_documents(chunks[i:i + batch_size]))
+    return time.perf_counter() - start, np.asarray(vectors, dtype=np.float32)
+
+
+def run_parallel(chunks: list[str], workers: int, batch_size: int):
+    model = ParallelEmbeddings(workers=workers, batch_size=batch_size)
+    try:
+        # Force every worker to start and load its model before timing
+        model.embed_documents(chunks[:batch_size] * workers)
+        start = time.perf_counter()
+        vectors = model.embed_documents(chunks)
+        return time.perf_counter() - start, np.asarray(vectors, dtype=np.float32)
+    finally:
+        model.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--batch-size", type=int, default=WORKER_BATCH_SIZE)
+    args = parser.parse_args()
+
+    chunks = synthetic_chunks(args.chunks)
+    print(f"{args.chunks} chunks, model {EMBEDDING_MODEL_NAME}, {os.cpu_count()} CPUs, shard size {args.batch_size}")
+
+    baseline_seconds, baseline = run_single(chunks, args.batch_size)
+    print(f"{'workers':>8} {'chunks/s':>10} {'speedup':>8} {'max |diff|':>11}")
+    print(f"{'1 (in-process)':>8} {len(chunks) / baseline_seconds:10.1f} {1.0:8.2f} {0.0:11.2e}")
+
+    for workers in sorted(set(w for w in args.workers if w > 1)):
+        seconds, vectors = run_parallel(chunks, workers, args.batch_size)
+        diff = float(np.abs(vectors - baseline).max())
+        print(f"{workers:>8} {len(chunks) / seconds:10.1f} {baseline_seconds / seconds:8.2f} {diff:11.2e}")
+
+
+if __name__ == "__main__":
+    main()
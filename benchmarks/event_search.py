@@ -0,0 +1,132 @@
+"""
+Latency and plans of /events/search queries on a large catalog.
+
+    python -m benchmarks.event_search --seed 1000000   # fill an empty DB first
+    python -m benchmarks.event_search
+
+Runs against DATABASE_URL at migration head. Seeded events get titles,
+venues and descriptions drawn from a small vocabulary, and three tickets
+each at varied prices, so both rare and common terms can be timed. On
+PostgreSQL each query's EXPLAIN ANALYZE is printed so you can check that it
+uses the GIN and ticket indexes. SQLite only exercises the LIKE fallback.
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, text
+
+from app.database import engine
+from app.db_migrations import run_migrations
+from app.events.search import search_statement
+from app.models import Event, Ticket, User
+
+SEED_BATCH = 10_000
+GENRES = ["jazz", "rock", "techno", "opera", "comedy", "poetry", "chess", "marathon", "film", "ballet"]
+ADJECTIVES = ["summer", "winter", "midnight", "grand", "open-air", "acoustic", "charity", "student"]
+CITIES = ["Lisbon", "Oslo", "Nairobi", "Lima", "Osaka", "Denver", "Krakow", "Hanoi"]
+
+
+def seed(events: int):
+    """Insert `events` synthetic events with three tickets each."""
+    rnd = random.Random(7)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    organizers = max(events // 1000, 1)
+
+    def batched(table, rows):
+        with engine.begin() as conn:
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) == SEED_BATCH:
+                    conn.execute(insert(table), batch)
+                    batch = []
+            if batch:
+                conn.execute(insert(table), batch)
+
+    def event_row(i):
+        genre, adjective, city = rnd.choice(GENRES), rnd.choice(ADJECTIVES), rnd.choice(CITIES)
+        return {
+            "id": i,
+            "title": f"{adjective.title()} {genre.title()} Night {i}",
+            "description": f"A {adjective} {genre} event in {city} with guests from {rnd.choice(CITIES)}.",
+            "date": start + timedelta(minutes=30 * i),
+            "venue": f"{city} Hall {i % 50}",
+            "organizer_id": rnd.randint(1, organizers),
+        }
+
+    batched(User, ({"id": i, "username": f"organizer{i}", "email": f"organizer{i}@example.com",
+                    "password": "x"} for i in range(1, organizers + 1)))
+    batched(Event, (event_row(i) for i in range(1, events + 1)))
+    batched(Ticket, ({"id": i, "type": ("General", "VIP", "Student")[i % 3],
+                      "price": float(rnd.randint(5, 500)), "quantity": 1000, "event_id": (i - 1) // 3 + 1}
+                     for i in range(1, events * 3 + 1)))
+    if engine.dialect.name == "postgresql":
+        # Explicit ids above leave the serial sequences behind
+        with engine.begin() as conn:
+            for table in ("users", "events", "tickets"):
+                conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"(SELECT MAX(id) FROM {table}))"
+                ))
+    print(f"🌱 Seeded {events} events, {events * 3} tickets.")
+
+
+def scenarios():
+    march = datetime(2026, 3, 1, tzinfo=timezone.utc)
+    return {
+        "rare term": dict(q="Night 424242"),
+        "common term": dict(q="jazz"),
+        "two terms": dict(q="acoustic opera"),
+        "phrase + venue": dict(q='"midnight techno" Osaka'),
+        "term + dates": dict(q="comedy", date_from=march, date_to=march + timedelta(days=14)),
+        "term + price": dict(q="ballet", price_min=20, price_max=40),
+        "all facets": dict(q="film Lima", date_from=march, date_to=march + timedelta(days=60),
+                           price_min=100, price_max=200),
+        "facets only": dict(q=None, date_from=march, date_to=march + timedelta(days=7), price_max=50),
+    }
+
+
+def run(repeats: int, limit: int):
+    postgres = engine.dialect.name == "postgresql"
+    with engine.connect() as conn:
+        for name, params in scenarios().items():
+            statement = search_statement(**params, limit=limit + 1, dialect=engine.dialect.name)
+
+            timings = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                rows = conn.execute(statement).all()
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            print(f"\n--- {name}: {len(rows)} rows, median {statistics.median(timings):.2f} ms, "
+                  f"p95 {p95:.2f} ms over {repeats} runs")
+
+            if postgres:
+                sql = str(statement.compile(engine, compile_kwargs={"literal_binds": True}))
+                for row in conn.execute(text("EXPLAIN ANALYZE " + sql)):
+                    print("   ", row[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0, help="seed N synthetic events first")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    run_migrations("head")
+    if args.seed:
+        seed(args.seed)
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as conn:
+            conn.execute(text("ANALYZE"))
+            conn.commit()
+    run(args.repeats, args.limit)
+
+
+if __name__ == "__main__":
+    main()
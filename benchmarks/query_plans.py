@@ -0,0 +1,144 @@
+"""
+Query plans and timings for the hot lookups, before and after the index
+migration (0001 -> 0002).
+
+    python -m benchmarks.query_plans --scratch --seed 1000000   # fill an empty DB first
+    python -m benchmarks.query_plans --scratch                  # compare plans
+
+Runs against DATABASE_URL, which must be a throwaway database: the schema
+is migrated down to 0001 for the "before" run, which drops every table and
+column added since (outbox, reminders, reservation ids...) along with their
+data, and back up to head for the "after" run. Refuses to run without
+--scratch.
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, select, text
+
+from app.database import engine
+from app.db_migrations import run_migrations, downgrade_migrations
+from app.models import User, Event, Ticket, Booking
+
+SEED_BATCH = 10_000
+
+# Only columns that exist at 0001; later migrations add more to these tables
+EVENT_COLUMNS = (Event.id, Event.title, Event.description, Event.date, Event.venue, Event.organizer_id)
+TICKET_COLUMNS = (Ticket.id, Ticket.type, Ticket.price, Ticket.quantity, Ticket.event_id)
+BOOKING_COLUMNS = (Booking.id, Booking.customer_id, Booking.event_id, Booking.ticket_id,
+                   Booking.quantity, Booking.total_price, Booking.booking_date)
+
+
+def seed(bookings: int):
+    """Insert a synthetic catalog sized around `bookings` booking rows."""
+    users = max(bookings // 50, 10)
+    events = max(bookings // 20, 10)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    rnd = random.Random(42)
+
+    def batched(table, rows):
+        with engine.begin() as conn:
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) == SEED_BATCH:
+                    conn.execute(insert(table), batch)
+                    batch = []
+            if batch:
+                conn.execute(insert(table), batch)
+
+    batched(User, ({"id": i, "username": f"user{i}", "email": f"user{i}@example.com",
+                    "password": "x"} for i in range(1, users + 1)))
+    batched(Event, ({"id": i, "title": f"Event {i}", "description": "Synthetic event",
+                     "date": start + timedelta(hours=i), "venue": f"Hall {i % 100}",
+                     "organizer_id": rnd.randint(1, users)} for i in range(1, events + 1)))
+    batched(Ticket, ({"id": i, "type": ("General", "VIP", "Student")[i % 3], "price": 100.0,
+                      "quantity": 1000, "event_id": (i - 1) // 3 + 1}
+                     for i in range(1, events * 3 + 1)))
+    batched(Booking, ({"customer_id": rnd.randint(1, users), "event_id": (t - 1) // 3 + 1,
+                       "ticket_id": t, "quantity": 1, "total_price": 100.0,
+                       "booking_date": start + timedelta(minutes=n)}
+                      for n, t in ((n, rnd.randint(1, events * 3)) for n in range(bookings))))
+    if engine.dialect.name == "postgresql":
+        # Explicit ids above leave the serial sequences behind
+        with engine.begin() as conn:
+            for table in ("users", "events", "tickets"):
+                conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"(SELECT MAX(id) FROM {table}))"
+                ))
+    print(f"🌱 Seeded {users} users, {events} events, {events * 3} tickets, {bookings} bookings.")
+
+
+def hot_queries():
+    day = datetime(2026, 2, 1, tzinfo=timezone.utc)
+    return {
+        "get_my_events": select(*EVENT_COLUMNS).where(Event.organizer_id == 7).order_by(Event.id).limit(51),
+        "events_in_date_range": select(*EVENT_COLUMNS)
+            .where(Event.date >= day, Event.date <= day + timedelta(days=7))
+            .order_by(Event.id).limit(51),
+        "get_tickets_for_event": select(*TICKET_COLUMNS).where(Ticket.event_id == 7),
+        "get_user_bookings": select(*BOOKING_COLUMNS).where(Booking.customer_id == 7)
+            .order_by(Booking.id.desc()).limit(51),
+        "user_bookings_in_date_range": select(*BOOKING_COLUMNS)
+            .where(Booking.customer_id == 7, Booking.booking_date >= day,
+                   Booking.booking_date <= day + timedelta(days=30)),
+        "bookings_for_event": select(*BOOKING_COLUMNS).where(Booking.event_id == 7),
+    }
+
+
+def explain(label: str, repeats: int):
+    postgres = engine.dialect.name == "postgresql"
+    prefix = "EXPLAIN ANALYZE " if postgres else "EXPLAIN QUERY PLAN "
+    print(f"\n===== {label} =====")
+    with engine.connect() as conn:
+        for name, statement in hot_queries().items():
+            sql = str(statement.compile(engine, compile_kwargs={"literal_binds": True}))
+            plan = conn.execute(text(prefix + sql)).fetchall()
+
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                conn.execute(statement).fetchall()
+                timings.append((time.perf_counter() - start) * 1000)
+
+            print(f"\n--- {name}: median {statistics.median(timings):.2f} ms over {repeats} runs")
+            for row in plan:
+                print("   ", row[0] if postgres else row[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0, help="seed N synthetic bookings first")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--scratch", action="store_true",
+                        help="confirm DATABASE_URL is a throwaway database that may lose data")
+    args = parser.parse_args()
+    if not args.scratch:
+        parser.error(f"this downgrades {engine.url.render_as_string(hide_password=True)} to 0001 "
+                     "and drops data; pass --scratch if it is a throwaway database")
+
+    run_migrations("head")
+    if args.seed:
+        seed(args.seed)
+
+    downgrade_migrations("0001")
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            conn.execute(text("ANALYZE"))
+            conn.commit()
+    explain("BEFORE (0001, no lookup indexes)", args.repeats)
+
+    run_migrations("head")
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            conn.execute(text("ANALYZE"))
+            conn.commit()
+    explain("AFTER (head)", args.repeats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+WebSocket connect-to-first-answer latency for /ws/rag, with the shared RAG
+runtime versus the old per-connection initialization.
+
+    python -m benchmarks.rag_connect_latency --connections 50
+
+A fake chat model stands in for Gemini, so the numbers cover prompt loading,
+opening Chroma and building the chain, but not LLM latency. The answer cache
+is cleared and the question varied before every connection so each one
+really runs the chain. Needs a built
+index (python -m app.rag.setup_rag) and DATABASE_URL (defaults to SQLite).
+"""
+import argparse
+import os
+import statistics
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./benchmark.db")
+
+from fastapi.testclient import TestClient
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from app.main import app
+from app.rag import answer_cache, query_rag
+
+QUESTIONS = [
+    "Which events are coming up?",
+    "What concerts are on next month?",
+    "Are there any comedy shows this weekend?",
+    "Which venues host jazz nights?",
+    "What is the cheapest ticket for a festival?",
+]
+
+
+def _fake_llm():
+    return FakeListChatModel(responses=["There are upcoming events at the main hall."])
+
+
+def _run(client: TestClient, connections: int, per_connection_init: bool) -> list[float]:
+    timings = []
+    for i in range(connections):
+        if per_connection_init:
+            # What every connection paid before: fresh prompt, LLM and Chroma handle
+            query_rag.reset_rag_runtime()
+            query_rag.set_llm(_fake_llm())
+
+        # A cached answer would skip the chain entirely
+        answer_cache.clear()
+        question = f"{QUESTIONS[i % len(QUESTIONS)]} ({i})"
+
+        start = time.perf_counter()
+        with client.websocket_connect("/ws/rag") as ws:
+            ws.receive_text()  # greeting
+            ws.send_text(question)
+            ws.receive_text()  # echo
+            ws.receive_text()  # first streamed chunk
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _report(label: str, timings: list[float]):
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"{label:<24} p50={statistics.median(ordered):8.1f} ms  p95={p95:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=50)
+    args = parser.parse_args()
+
+    with TestClient(app) as client:
+        _report("per-connection init", _run(client, args.connections, per_connection_init=True))
+
+        query_rag.reset_rag_runtime()
+        query_rag.set_llm(_fake_llm())
+        query_rag.get_rag_chain()  # what the startup warm-up does
+        _report("shared runtime", _run(client, args.connections, per_connection_init=False))
+
+
+if __name__ == "__main__":
+    main()
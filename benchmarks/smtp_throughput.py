@@ -0,0 +1,161 @@
+"""
+Messages/second for email delivery against a local SMTP stand-in:
+
+- per-message: new connection + login for every message (the old tasks)
+- pooled:      one pooled session reused per message (send_booking_email & co)
+- batch:       deliver_batch() over one session (send_email_batch)
+
+    python -m benchmarks.smtp_throughput --messages 2000 --handshake-ms 40
+
+--handshake-ms delays each new connection's greeting to stand in for the TCP +
+TLS + AUTH cost of a real provider. The stand-in counts what it receives, and
+the run fails if any message is missing. --drop-every N closes the server side
+of a session after every N messages, to exercise reconnects.
+"""
+import argparse
+import smtplib
+import socketserver
+import sys
+import threading
+import time
+
+from app.utils.email_utils import build_message, deliver_batch
+from app.utils.smtp_pool import SMTPConnectionPool
+
+
+class StandInSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, handshake_seconds: float, drop_every: int = 0, on_message=None, port: int = 0):
+        super().__init__(("127.0.0.1", port), _SMTPHandler)
+        self.handshake_seconds = handshake_seconds
+        self.drop_every = drop_every
+        # Called with each message's Subject as it is accepted
+        self.on_message = on_message
+        self.received = 0
+        self.connections = 0
+        self.lock = threading.Lock()
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough of RFC 5321 for smtplib: EHLO/HELO, AUTH, MAIL, RCPT, DATA, NOOP, RSET, QUIT."""
+
+    def reply(self, line: str):
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        time.sleep(server.handshake_seconds)
+        self.reply("220 stand-in ESMTP")
+        accepted = 0
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self.reply("250-stand-in")
+                self.reply("250 AUTH PLAIN LOGIN")
+            elif command.startswith("AUTH"):
+                self.reply("235 2.7.0 Authentication successful")
+            elif command.startswith(("MAIL", "RCPT", "RSET", "NOOP")):
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                subject = None
+                while True:
+                    data = self.rfile.readline()
+                    if data in (b".\r\n", b""):
+                        break
+                    if subject is None and data.startswith(b"Subject: "):
+                        subject = data[len(b"Subject: "):].decode(errors="replace").strip()
+                with server.lock:
+                    server.received += 1
+                if server.on_message is not None:
+                    server.on_message(subject)
+                accepted += 1
+                self.reply("250 OK queued")
+                if server.drop_every and accepted % server.drop_every == 0:
+                    return  # hang up without QUIT, like a provider timing out a session
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+def _messages(count: int) -> list[dict]:
+    return [
+        {"to": f"attendee{i}@example.com", "subject": "Reminder: Test Event starts soon!",
+         "body": f"Hi there,\n\nThis is reminder #{i}.\n"}
+        for i in range(count)
+    ]
+
+
+def per_message(port: int, messages: list[dict]):
+    for m in messages:
+        with smtplib.SMTP("127.0.0.1", port) as server:
+            server.login("bench", "bench")
+            server.send_message(build_message(m["to"], m["subject"], m["body"]))
+
+
+def pooled(pool: SMTPConnectionPool, messages: list[dict]):
+    for m in messages:
+        pool.send(build_message(m["to"], m["subject"], m["body"]))
+
+
+def batch(pool: SMTPConnectionPool, messages: list[dict], batch_size: int):
+    for i in range(0, len(messages), batch_size):
+        result = deliver_batch(messages[i:i + batch_size], pool=pool)
+        if result["failed"]:
+            raise RuntimeError(f"{len(result['failed'])} messages failed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--handshake-ms", type=float, default=40)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--drop-every", type=int, default=0)
+    args = parser.parse_args()
+
+    server = StandInSMTPServer(args.handshake_ms / 1000, args.drop_every)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    messages = _messages(args.messages)
+
+    def make_pool():
+        return SMTPConnectionPool(host="127.0.0.1", port=port, use_ssl=False, user="bench", password="bench", size=1)
+
+    runs = [
+        # The legacy path is slow by design; a slice is enough to get its rate
+        ("per-message", lambda: per_message(port, messages[:max(len(messages) // 10, 1)]), max(len(messages) // 10, 1)),
+        ("pooled", lambda: pooled(make_pool(), messages), len(messages)),
+        ("batch", lambda: batch(make_pool(), messages, args.batch_size), len(messages)),
+    ]
+
+    ok = True
+    print(f"{'mode':<12} {'messages':>8} {'msg/s':>9} {'connections':>12}")
+    for name, run, expected in runs:
+        with server.lock:
+            server.received = server.connections = 0
+        start = time.perf_counter()
+        run()
+        seconds = time.perf_counter() - start
+        time.sleep(0.05)  # let the last server thread finish counting
+        with server.lock:
+            received, connections = server.received, server.connections
+        print(f"{name:<12} {received:>8} {received / seconds:9.1f} {connections:>12}")
+        if received != expected:
+            print(f"❌ {name}: stand-in received {received} of {expected} messages")
+            ok = False
+
+    server.shutdown()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
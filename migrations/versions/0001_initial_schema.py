@@ -0,0 +1,67 @@
+"""Initial schema (what Base.metadata.create_all used to build)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+Databases created by the old create_all at import time already have these
+tables; mark them with `alembic stamp 0001` before upgrading.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("username", sa.String(), nullable=False, unique=True),
+        sa.Column("email", sa.String(), nullable=False, unique=True),
+        sa.Column("password", sa.String(), nullable=False),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+
+    op.create_table(
+        "events",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("description", sa.String()),
+        sa.Column("date", sa.DateTime(timezone=True)),
+        sa.Column("venue", sa.String()),
+        sa.Column("organizer_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+    )
+    op.create_index("ix_events_id", "events", ["id"])
+
+    op.create_table(
+        "tickets",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("price", sa.Float(), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("event_id", sa.Integer(), sa.ForeignKey("events.id"), nullable=False),
+    )
+    op.create_index("ix_tickets_id", "tickets", ["id"])
+
+    op.create_table(
+        "bookings",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("customer_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("event_id", sa.Integer(), sa.ForeignKey("events.id")),
+        sa.Column("ticket_id", sa.Integer(), sa.ForeignKey("tickets.id")),
+        sa.Column("quantity", sa.Integer()),
+        sa.Column("total_price", sa.Float()),
+        sa.Column("booking_date", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_bookings_id", "bookings", ["id"])
+
+
+def downgrade():
+    op.drop_table("bookings")
+    op.drop_table("tickets")
+    op.drop_table("events")
+    op.drop_table("users")
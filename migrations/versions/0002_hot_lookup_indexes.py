@@ -0,0 +1,51 @@
+"""Indexes for the hot foreign-key and date lookups
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+- events (organizer_id, id): get_my_events filter + keyset order
+- events (date): date-range filters on event listings
+- tickets (event_id): get_tickets_for_event, tickets/my join, with-tickets
+- bookings (customer_id, id): get_user_bookings filter + keyset order
+- bookings (customer_id, booking_date): customer bookings by date range
+- bookings (event_id), bookings (ticket_id): per-event / per-ticket lookups
+  and the FK checks when events or tickets are deleted
+
+The composite indexes also serve lookups on their leading column alone.
+On Postgres the indexes are built CONCURRENTLY so live tables stay writable.
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_events_organizer_id_id", "events", ["organizer_id", "id"]),
+    ("ix_events_date", "events", ["date"]),
+    ("ix_tickets_event_id", "tickets", ["event_id"]),
+    ("ix_bookings_customer_id_id", "bookings", ["customer_id", "id"]),
+    ("ix_bookings_customer_id_booking_date", "bookings", ["customer_id", "booking_date"]),
+    ("ix_bookings_event_id", "bookings", ["event_id"]),
+    ("ix_bookings_ticket_id", "bookings", ["ticket_id"]),
+]
+
+
+def _concurrently() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def upgrade():
+    concurrently = _concurrently()
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=concurrently)
+
+
+def downgrade():
+    concurrently = _concurrently()
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=concurrently)
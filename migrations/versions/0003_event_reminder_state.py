@@ -0,0 +1,25 @@
+"""Per-event reminder state
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+- events.reminder_sent_at: set when the reminder fan-out for an event is
+  claimed, so each event is reminded once (cleared if the date changes)
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("events", sa.Column("reminder_sent_at", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("events") as batch_op:
+        batch_op.drop_column("reminder_sent_at")
@@ -0,0 +1,35 @@
+"""Transactional outbox for booking side effects
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+- outbox: Celery tasks written in the same transaction as the booking,
+  published by the relay (app/outbox.py) and deleted once sent
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "outbox",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("task", sa.String(), nullable=False),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("available_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_error", sa.String()),
+    )
+    op.create_index("ix_outbox_available_at_id", "outbox", ["available_at", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_outbox_available_at_id", table_name="outbox")
+    op.drop_table("outbox")
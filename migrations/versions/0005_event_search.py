@@ -0,0 +1,62 @@
+"""Full-text event search
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+
+- events.search_vector (PostgreSQL only): stored generated tsvector over
+  title (weight A), venue (B) and description (C), with a GIN index, for
+  /events/search matching and ranking
+- tickets (event_id, price): price facet probe of /events/search
+
+SQLite has no tsvector; the search endpoint falls back to LIKE matching
+there, so only the ticket index is created. Adding the generated column
+rewrites the events table once; the indexes are built CONCURRENTLY.
+"""
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+# Must match app.events.search.SEARCH_LANGUAGE
+SEARCH_LANGUAGE = "english"
+
+SEARCH_VECTOR = (
+    f"setweight(to_tsvector('{SEARCH_LANGUAGE}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_LANGUAGE}', coalesce(venue, '')), 'B') || "
+    f"setweight(to_tsvector('{SEARCH_LANGUAGE}', coalesce(description, '')), 'C')"
+)
+
+
+def _postgres() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def upgrade():
+    postgres = _postgres()
+    if postgres:
+        op.execute(
+            f"ALTER TABLE events ADD COLUMN search_vector tsvector "
+            f"GENERATED ALWAYS AS ({SEARCH_VECTOR}) STORED"
+        )
+    with op.get_context().autocommit_block():
+        if postgres:
+            op.execute(
+                "CREATE INDEX CONCURRENTLY ix_events_search_vector "
+                "ON events USING gin (search_vector)"
+            )
+        op.create_index(
+            "ix_tickets_event_id_price", "tickets", ["event_id", "price"], postgresql_concurrently=postgres
+        )
+
+
+def downgrade():
+    postgres = _postgres()
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_tickets_event_id_price", table_name="tickets", postgresql_concurrently=postgres)
+        if postgres:
+            op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_events_search_vector")
+    if postgres:
+        op.execute("ALTER TABLE events DROP COLUMN search_vector")
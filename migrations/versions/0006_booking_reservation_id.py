@@ -0,0 +1,39 @@
+"""Idempotent hot-inventory write-back
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+
+- bookings.reservation_id: id of the hot-inventory reservation a booking
+  was written from (NULL for regular bookings). The unique index lets the
+  reconciler replay a batch with ON CONFLICT DO NOTHING.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def _postgres() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def upgrade():
+    postgres = _postgres()
+    op.add_column("bookings", sa.Column("reservation_id", sa.String(), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_bookings_reservation_id", "bookings", ["reservation_id"],
+            unique=True, postgresql_concurrently=postgres,
+        )
+
+
+def downgrade():
+    postgres = _postgres()
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_bookings_reservation_id", table_name="bookings", postgresql_concurrently=postgres)
+    with op.batch_alter_table("bookings") as batch_op:
+        batch_op.drop_column("reservation_id")